@@ -0,0 +1,137 @@
+from ...rapid.rapid_db.models.rapid_logging import StageLog
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from sqlmodel import Session, SQLModel, func, select
+from threading import Lock
+from typing import Any, Callable, List
+import logging
+import sqlalchemy as sa
+import uuid
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Job(SQLModel, table=False):
+    id: str
+    name: str
+    status: JobStatus = JobStatus.queued
+    cdc_key: int | None = None
+    tables_total: int | None = None
+    datetime_created: datetime
+    datetime_started: datetime | None = None
+    datetime_ended: datetime | None = None
+    error: str | None = None
+    result: Any = None
+
+
+class JobProgress(Job, table=False):
+    tables_done: int = 0
+    tables_succeeded: int = 0
+    tables_failed: int = 0
+    number_of_records_processed: int = 0
+
+
+class JobManager:
+    # Jobs run on a local pool of threads, so a request only enqueues the work and
+    # returns. Jobs are kept in memory, the most recent max_jobs are available.
+    def __init__(self, max_workers: int = 4, max_jobs: int = 1000):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def submit(
+        self,
+        name: str,
+        function: Callable[[Job], Any],
+        cdc_key: int | None = None,
+    ) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            name=name,
+            cdc_key=cdc_key,
+            datetime_created=datetime.now(),
+        )
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="rapid-job"
+                )
+            self._jobs[job.id] = job
+            self._evict_finished_jobs()
+            self._executor.submit(self._run, job, function)
+        logger.info(f"Queued job: {name} with ID: {job.id}")
+        return job
+
+    def get_job(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            logger.warning(f"No job found with ID: {job_id}")
+            raise ValueError(f"404: job with ID: {job_id} not found.")
+        return job
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def shutdown(self, wait: bool = True) -> None:
+        # Queued jobs are dropped, running jobs finish so no stage_log is left open.
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _evict_finished_jobs(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                return
+            if self._jobs[job_id].status in (JobStatus.succeeded, JobStatus.failed):
+                del self._jobs[job_id]
+
+    def _run(self, job: Job, function: Callable[[Job], Any]) -> None:
+        job.status = JobStatus.running
+        job.datetime_started = datetime.now()
+        try:
+            job.result = function(job)
+            job.status = JobStatus.succeeded
+        except Exception as exception:
+            logger.error(
+                f"Failed to run job: {job.name} with ID: {job.id} with error message: {exception}"
+            )
+            job.error = str(exception)
+            job.status = JobStatus.failed
+        job.datetime_ended = datetime.now()
+
+
+def get_job_progress(session: Session, job: Job) -> JobProgress:
+    # Table jobs use the job ID as run_id of their stage_logs, so the progress is read
+    # from the closed stage_logs of the run.
+    tables_done, tables_succeeded, number_of_records_processed = session.exec(
+        select(
+            func.count(StageLog.id),
+            func.sum(sa.case((StageLog.success, 1), else_=0)),
+            func.sum(StageLog.number_of_records_processed),
+        ).where(StageLog.run_id == job.id, ~StageLog.is_open)
+    ).one()
+    return JobProgress(
+        **job.model_dump(),
+        tables_done=tables_done,
+        tables_succeeded=tables_succeeded or 0,
+        tables_failed=tables_done - (tables_succeeded or 0),
+        number_of_records_processed=number_of_records_processed or 0,
+    )
+
+
+job_manager = JobManager()
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from ...rapid.rapid_db.database import get_session
+from sqlmodel import Session
+from typing import List
+from .logic import Job, JobProgress, get_job_progress, job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/", response_model=List[Job])
+def list_jobs():
+    return job_manager.list_jobs()
+
+
+@router.get("/{job_id}", response_model=JobProgress)
+def get_job(job_id: str, session: Session = Depends(get_session)):
+    try:
+        job = job_manager.get_job(job_id)
+    except ValueError as exception:
+        raise HTTPException(404, detail=str(exception))
+    return get_job_progress(session, job)
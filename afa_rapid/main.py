@@ -1,15 +1,34 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response
+import asyncio
+import os
 from .rapid_logging.router import router as rapid_logging_router
 from .metadata.router import router as metadata_router
 from .orchestration.router import router as orchestration_router
-from boilerplate.rapid_db.database import build_database
+from .jobs.router import router as jobs_router
+from .jobs.logic import job_manager
+from boilerplate.rapid_db.database import build_database, engine
+from boilerplate.rapid_db.partitioning import run_partition_maintenance
+from boilerplate.rapid_db.crud.buffered_rapid_logging import (
+    buffered_stage_log_message_writer,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     build_database()
+    buffered_stage_log_message_writer.start()
+    retention_days = os.getenv("RAPID_DB_MESSAGE_RETENTION_DAYS")
+    partition_maintenance = asyncio.create_task(
+        run_partition_maintenance(
+            engine, retention_days=int(retention_days) if retention_days else None
+        )
+    )
     yield
+    partition_maintenance.cancel()
+    # Waiting for the running jobs blocks, so it runs off the event loop.
+    await asyncio.to_thread(job_manager.shutdown)
+    await buffered_stage_log_message_writer.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -18,6 +37,7 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(metadata_router)
 app.include_router(rapid_logging_router)
 app.include_router(orchestration_router)
+app.include_router(jobs_router)
 
 
 @app.get("/", include_in_schema=False)
@@ -1,62 +1,42 @@
 import polars as pl
-from ...rapid.rapid_db.models.catalog import (
-    Source,
-    Stage,
-    DataTypeMapping,
-    Table,
-    Column,
-)
-from ...rapid.rapid_db.crud.catalog import (
-    source_crud,
-    stage_crud,
-    data_type_mapping_crud,
-    table_crud,
-    column_crud,
-)
-
-from sqlmodel import SQLModel, Session
-from typing import List
-from ...rapid.rapid_db.crud.base import GenericCrud
-
-
-def read_metadata_excel(source_location: str, sheet_name: str) -> List[pl.DataFrame]:
-    df_excel = pl.read_excel(
-        source_location, sheet_name=sheet_name, read_options={"has_header": True}
-    )
-    return df_excel
-
+from ...rapid.rapid_db.metadata import METADATA_SHEETS, sync_metadata
 
-def create_objects(df: pl.DataFrame, object_type: SQLModel) -> List[SQLModel]:
-    return [object_type.Create(**row) for row in df.rows(named=True)]
+from sqlmodel import Session
+from typing import Dict, Sequence
+import os
 
-
-def insert_objects(
-    session: Session, objects: List[SQLModel], crud_method: GenericCrud
-) -> None:
-    for object in objects:
-        crud_method.insert_into_table(session, object)
-
-
-def parse_metadata(session: Session):
-    metadata_file_path = (
-        "/Users/rickdeharder/Code/BDRThermea/platform/test_framework/metadata.xlsx"
+METADATA_LOCATION = (
+    "/Users/rickdeharder/Code/BDRThermea/platform/test_framework/metadata.xlsx"
+)
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xlsb", ".xls")
+
+
+def read_metadata_bundle(
+    source_location: str, sheet_names: Sequence[str]
+) -> Dict[str, pl.DataFrame]:
+    # A workbook is opened and parsed once for all sheets.
+    if source_location.lower().endswith(EXCEL_EXTENSIONS):
+        return pl.read_excel(source_location, sheet_name=list(sheet_names))
+
+    # A directory holds one Parquet or CSV file per sheet, these are scanned lazily and
+    # collected together.
+    if not os.path.isdir(source_location):
+        raise ValueError(f"Unsupported metadata location: {source_location}")
+    lazy_frames = []
+    for sheet_name in sheet_names:
+        parquet_location = os.path.join(source_location, f"{sheet_name}.parquet")
+        csv_location = os.path.join(source_location, f"{sheet_name}.csv")
+        if os.path.isfile(parquet_location):
+            lazy_frames.append(pl.scan_parquet(parquet_location))
+        elif os.path.isfile(csv_location):
+            lazy_frames.append(pl.scan_csv(csv_location))
+        else:
+            raise ValueError(f"No metadata file found for sheet: {sheet_name}")
+    return dict(zip(sheet_names, pl.collect_all(lazy_frames)))
+
+
+def parse_metadata(session: Session, metadata_location: str = METADATA_LOCATION):
+    metadata = read_metadata_bundle(
+        metadata_location, sheet_names=list(METADATA_SHEETS)
     )
-
-    # The order of the arrays below is important, they shoud allign with each other.
-    tables_to_parse = ["sources", "stages", "data_type_mappings", "tables", "columns"]
-    object_classes = [Source, Stage, DataTypeMapping, Table, Column]
-    crud_methods = [
-        source_crud,
-        stage_crud,
-        data_type_mapping_crud,
-        table_crud,
-        column_crud,
-    ]
-    data_frames = [
-        read_metadata_excel(source_location=metadata_file_path, sheet_name=table)
-        for table in tables_to_parse
-    ]
-
-    for df, object_class, crud_method in zip(data_frames, object_classes, crud_methods):
-        objects = create_objects(df=df, object_type=object_class)
-        insert_objects(session, objects=objects, crud_method=crud_method)
+    return sync_metadata(session, metadata)
@@ -1,12 +1,99 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from .logic import parse_metadata
-from boilerplate.rapid_db.database import get_session
+from ..jobs.logic import Job, job_manager
+from boilerplate.rapid_db.database import engine, get_session
+from boilerplate.rapid_db.crud.base import get_catalog_version
+from boilerplate.rapid_db.crud.catalog import (
+    source_crud,
+    stage_crud,
+    table_crud,
+    column_crud,
+    data_type_mapping_crud,
+)
+from boilerplate.rapid_db.models.catalog import TableSchema
 from sqlmodel import Session
 
 
 router = APIRouter(prefix="/metadata", tags=["metadata"])
 
+catalog_cruds = {
+    crud.name: crud
+    for crud in [
+        source_crud,
+        stage_crud,
+        table_crud,
+        column_crud,
+        data_type_mapping_crud,
+    ]
+}
+
 
 @router.get("/ingest_metadata")
-def ingest_metadata(session: Session = Depends(get_session)):
-    parse_metadata(session)
+def ingest_metadata(
+    response: Response,
+    background: bool = False,
+    session: Session = Depends(get_session),
+):
+    if background:
+
+        def run_job(job: Job) -> dict:
+            with Session(engine) as job_session:
+                return parse_metadata(job_session)
+
+        response.status_code = 202
+        return job_manager.submit("ingest_metadata", run_job)
+
+    try:
+        return parse_metadata(session)
+    except ValueError as exception:
+        raise HTTPException(422, detail=str(exception))
+
+
+@router.get("/tables/{table_id}/schema", response_model=TableSchema)
+def get_table_schema(
+    table_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    session: Session = Depends(get_session),
+):
+    try:
+        table_schema = table_crud.select_table_schema(session, table_id=table_id)
+    except ValueError as exception:
+        raise HTTPException(404, detail=str(exception))
+
+    etag = f'"{table_schema.version}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["X-Catalog-Version"] = str(get_catalog_version(session))
+    return table_schema
+
+
+@router.get("/catalog/{catalog_name}")
+def get_catalog_page(
+    catalog_name: str,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = 100,
+    if_none_match: str | None = Header(default=None),
+    session: Session = Depends(get_session),
+):
+    if catalog_name not in catalog_cruds:
+        raise HTTPException(404, detail=f"404: catalog {catalog_name} not found.")
+
+    # Every catalog write bumps the version, so an unchanged version means an unchanged
+    # page and the listing is not queried at all.
+    catalog_version = get_catalog_version(session)
+    etag = f'"catalog-{catalog_version}"'
+    headers = {"ETag": etag, "X-Catalog-Version": str(catalog_version)}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        items, next_cursor = catalog_cruds[catalog_name].select_page(
+            session, cursor=cursor, limit=limit
+        )
+    except ValueError as exception:
+        raise HTTPException(400, detail=str(exception))
+    response.headers.update(headers)
+    return {"items": items, "next_cursor": next_cursor, "version": catalog_version}
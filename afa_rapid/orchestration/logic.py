@@ -1,22 +1,88 @@
 from ...rapid.integrations.excel import ingest_excel
 from ...rapid.transformations.excel import enrich_excel
+from ...rapid.rapid_db.database import engine
 from ...rapid.rapid_db.models.catalog import Table
-from typing import Tuple
+from ...rapid.rapid_db.models.rapid_logging import StageLog
+from ...rapid.rapid_db.crud.rapid_logging import stage_log_crud
+from ...rapid.rapid_db.crud.buffered_rapid_logging import (
+    buffered_stage_log_message_writer,
+)
+from ...rapid.rapid_db.crud.catalog import table_crud
+from ...rapid.rapid_db.type_mapping import get_data_type_resolver
+from ...rapid.rapid_db.watermark import TableWatermark, get_table_watermark
+from .type_mapping import get_polars_schema
+from concurrent.futures import (
+    Executor,
+    Future,
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from collections import defaultdict, deque
+from sqlmodel import Session, SQLModel
+from typing import Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
 
 DATALAKE_ROOT = "/Users/rickdeharder/Code/BDRThermea/platform/test_framework"
 
+ProcessTable = Callable[[Table, int, TableWatermark | None], Tuple[bool, int]]
+
+
+def accepts_parameters(function: Callable, *names: str) -> bool:
+    parameters = inspect.signature(function).parameters
+    return all(name in parameters for name in names) or any(
+        parameter.kind is inspect.Parameter.VAR_KEYWORD
+        for parameter in parameters.values()
+    )
+
+
+# Incremental loads and typed reads need an ingest_excel that accepts watermark_column
+# and watermark_value, and schema. Older integrations do full, untyped reloads.
+INGEST_SUPPORTS_WATERMARK = accepts_parameters(
+    ingest_excel, "watermark_column", "watermark_value"
+)
+INGEST_SUPPORTS_SCHEMA = accepts_parameters(ingest_excel, "schema")
 
-def ingest_table(db_table: Table, cdc_key: int) -> Tuple[bool, int]:
+
+def ingest_table(
+    db_table: Table, cdc_key: int, watermark: TableWatermark | None = None
+) -> Tuple[bool, int]:
+    ingest_options = {}
+    # The Polars schema of the table comes from the compiled data_type_mappings, which are
+    # cached so this does not query per ingest.
+    if INGEST_SUPPORTS_SCHEMA and db_table.table_columns:
+        resolver = get_data_type_resolver(Session.object_session(db_table))
+        ingest_options["schema"] = get_polars_schema(resolver, db_table)
+    # Tables with a watermark column only pull the records changed since the last
+    # successful ingestion, the others are reloaded in full.
+    if watermark is not None and watermark.is_incremental:
+        if INGEST_SUPPORTS_WATERMARK:
+            ingest_options["watermark_column"] = watermark.watermark_column
+            ingest_options["watermark_value"] = watermark.watermark_value
+        else:
+            logger.warning(
+                f"ingest_excel does not accept a watermark, reloading table with ID: {db_table.id} in full"
+            )
     success, number_of_records_ingested = ingest_excel(
         db_table.table_source.name,
         source_location=f"{DATALAKE_ROOT}/data.xlsx",
         table_name=db_table.name,
         cdc_key=cdc_key,
+        **ingest_options,
     )
     return success, number_of_records_ingested
 
 
-def enrich_table(db_table: Table, cdc_key: int) -> Tuple[bool, int]:
+def enrich_table(
+    db_table: Table, cdc_key: int, watermark: TableWatermark | None = None
+) -> Tuple[bool, int]:
+    # Enrichment reads the records ingested under the cdc_key, which are incremental
+    # already, so the watermark is not needed.
     success, number_of_records_ingested = enrich_excel(
         source_location=f"{DATALAKE_ROOT}/{db_table.source_location}",
         cdc_key=cdc_key,
@@ -24,3 +90,171 @@ def enrich_table(db_table: Table, cdc_key: int) -> Tuple[bool, int]:
     )
 
     return success, number_of_records_ingested
+
+
+class TableProcessingResult(SQLModel, table=False):
+    table_id: int
+    stage_id: int | None = None
+    stage_log_id: int | None = None
+    success: bool = False
+    number_of_records_processed: int | None = None
+    error: str | None = None
+
+
+def process_table_with_stage_log(
+    process_table: ProcessTable,
+    table_id: int,
+    cdc_key: int,
+    run_id: str | None = None,
+) -> TableProcessingResult:
+    # Every table gets its own session, sessions are not safe to share between workers.
+    result = TableProcessingResult(table_id=table_id)
+    with Session(engine) as session:
+        db_table = table_crud.select_on_pk(session, model_id=table_id)
+        # Read before the new stage_log is opened, so only earlier runs count.
+        watermark = get_table_watermark(session, db_table)
+        db_stage_log = stage_log_crud.open_stage_log(
+            session=session,
+            stage_log=StageLog.Open(
+                table_id=db_table.id,
+                stage_id=db_table.stage_id,
+                cdc_key=cdc_key,
+                run_id=run_id,
+            ),
+        )
+        result.stage_id = db_table.stage_id
+        result.stage_log_id = db_stage_log.id
+
+        try:
+            success, number_of_records_processed = process_table(
+                db_table, cdc_key, watermark
+            )
+            result.success = success
+            result.number_of_records_processed = number_of_records_processed
+        except Exception as exception:
+            logger.error(
+                f"Failed to process table with ID: {table_id} with error message: {exception}"
+            )
+            result.error = str(exception)
+
+        # Messages buffered by the app are written first, they are rejected once the log
+        # is closed. A no-op in worker processes, they have no writer running.
+        buffered_stage_log_message_writer.flush_threadsafe()
+        stage_log_crud.close_stage_log(
+            session=session,
+            stage_log=StageLog.Close(
+                id=db_stage_log.id,
+                success=result.success,
+                number_of_records_processed=result.number_of_records_processed,
+            ),
+        )
+    return result
+
+
+def _init_worker_process():
+    # Connections inherited from the parent process must not be reused by the child.
+    engine.dispose(close=False)
+
+
+def create_executor(max_workers: int, use_processes: bool = False) -> Executor:
+    if use_processes:
+        return ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker_process
+        )
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+class TableJob(NamedTuple):
+    source_id: int
+    process_table: ProcessTable
+    table_id: int
+
+
+def schedule_table_jobs(
+    jobs: Iterable[TableJob],
+    cdc_key: int,
+    run_id: str | None = None,
+    max_workers: int = 4,
+    max_workers_per_source: int = 2,
+    use_processes: bool = False,
+    on_result: Callable[[TableProcessingResult], Iterable[TableJob]] | None = None,
+) -> List[TableProcessingResult]:
+    if max_workers < 1 or max_workers_per_source < 1:
+        raise ValueError(
+            f"max_workers and max_workers_per_source must be positive, got: {max_workers} and {max_workers_per_source}"
+        )
+
+    # Jobs are queued per source so no source gets more than max_workers_per_source
+    # concurrent jobs, while jobs of other sources keep the pool busy.
+    queued_jobs: Dict[int, deque] = defaultdict(deque)
+    for job in jobs:
+        queued_jobs[job.source_id].append(job)
+    running: Dict[Future, TableJob] = {}
+    running_per_source: Dict[int, int] = defaultdict(int)
+    results: List[TableProcessingResult] = []
+
+    def submit_available(executor: Executor) -> None:
+        for source_id, source_jobs in queued_jobs.items():
+            while (
+                source_jobs
+                and running_per_source[source_id] < max_workers_per_source
+                and len(running) < max_workers
+            ):
+                job = source_jobs.popleft()
+                future = executor.submit(
+                    process_table_with_stage_log,
+                    job.process_table,
+                    job.table_id,
+                    cdc_key,
+                    run_id,
+                )
+                running[future] = job
+                running_per_source[source_id] += 1
+
+    with create_executor(max_workers, use_processes=use_processes) as executor:
+        submit_available(executor)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                running_per_source[job.source_id] -= 1
+                try:
+                    result = future.result()
+                except Exception as exception:
+                    # The stage_log could not be opened or closed for this table.
+                    logger.error(
+                        f"Failed to process table with ID: {job.table_id} with error message: {exception}"
+                    )
+                    result = TableProcessingResult(
+                        table_id=job.table_id, error=str(exception)
+                    )
+                results.append(result)
+
+                # Follow up jobs are queued as soon as the job they depend on is done.
+                if on_result is not None:
+                    for next_job in on_result(result):
+                        queued_jobs[next_job.source_id].append(next_job)
+            submit_available(executor)
+
+    return results
+
+
+def process_tables_concurrently(
+    process_table: ProcessTable,
+    tables: Sequence[Table],
+    cdc_key: int,
+    run_id: str | None = None,
+    max_workers: int = 4,
+    max_workers_per_source: int = 2,
+    use_processes: bool = False,
+) -> List[TableProcessingResult]:
+    results = schedule_table_jobs(
+        [TableJob(table.source_id, process_table, table.id) for table in tables],
+        cdc_key=cdc_key,
+        run_id=run_id,
+        max_workers=max_workers,
+        max_workers_per_source=max_workers_per_source,
+        use_processes=use_processes,
+    )
+    results_per_table = {result.table_id: result for result in results}
+    return [results_per_table[table.id] for table in tables]
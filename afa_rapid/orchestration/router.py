@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
 import logging
-from ...rapid.rapid_db.database import get_session
-from ...rapid.rapid_db.models.catalog import Table, Stage
-from ...rapid.rapid_db.models.rapid_logging import StageLog
-from ...rapid.rapid_db.crud.rapid_logging import stage_log_crud
-from ...rapid.rapid_db.crud.catalog import table_crud
+from ...rapid.rapid_db.database import engine, get_session
+from ...rapid.rapid_db.crud.work_queue import work_item_crud
 from typing import List
-from sqlmodel import Session, select
+from sqlmodel import Session
 from datetime import datetime
-from .logic import ingest_table, enrich_table
+from .logic import TableProcessingResult
+from .scheduler import run_pipeline, ingest_stage_tables, enrich_stage_tables
+from .work_queue import drain_work_queue_concurrently, enqueue_stage_tables
+from ..jobs.logic import Job, job_manager
+from ...rapid.rapid_db.crud.catalog import stage_crud
+from ...rapid.rapid_db.watermark import validate_cdc_key
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -17,88 +19,159 @@ logger.setLevel(logging.WARNING)
 router = APIRouter(prefix="/orchestration", tags=["orchestration"])
 
 
-@router.get("/ingest_tables", response_model=List[Table])
-def ingest_tables(session: Session = Depends(get_session)):
-    db_stage_raw = session.exec(select(Stage).where(Stage.name == "raw")).first()
-    tables_to_process = session.exec(
-        select(Table).where(Table.stage_id == db_stage_raw.id)
+def set_tables_total(job: Job):
+    def on_tables_resolved(tables_total: int) -> None:
+        job.tables_total = tables_total
+
+    return on_tables_resolved
+
+
+@router.get("/ingest_tables", response_model=List[TableProcessingResult] | Job)
+def ingest_tables(
+    response: Response,
+    max_workers: int = 4,
+    max_workers_per_source: int = 2,
+    use_processes: bool = False,
+    background: bool = False,
+    session: Session = Depends(get_session),
+):
+    # Key that indicates the timestamp of ingestion.
+    cdc_key = round(datetime.now().timestamp())
+
+    if background:
+        # The job ID is the run_id of the stage_logs, the job progress is read from them.
+        def run_job(job: Job) -> List[TableProcessingResult]:
+            with Session(engine) as job_session:
+                return ingest_stage_tables(
+                    job_session,
+                    cdc_key=cdc_key,
+                    run_id=job.id,
+                    max_workers=max_workers,
+                    max_workers_per_source=max_workers_per_source,
+                    use_processes=use_processes,
+                    on_tables_resolved=set_tables_total(job),
+                )
+
+        response.status_code = 202
+        return job_manager.submit("ingest_tables", run_job, cdc_key=cdc_key)
+
+    return ingest_stage_tables(
+        session,
+        cdc_key=cdc_key,
+        run_id="testing",
+        max_workers=max_workers,
+        max_workers_per_source=max_workers_per_source,
+        use_processes=use_processes,
     )
 
+
+@router.get("/process_tables", response_model=List[TableProcessingResult])
+def process_tables(
+    max_workers: int = 4,
+    max_workers_per_source: int = 2,
+    use_processes: bool = False,
+):
     # Key that indicates the timestamp of ingestion.
     cdc_key = round(datetime.now().timestamp())
 
-    for table in tables_to_process:
-        stage_log = StageLog.Open(
-            table_id=table.id,
-            stage_id=table.stage_id,
+    # Tables are enriched as soon as their own ingestion succeeded, instead of waiting
+    # for all raw tables to be ingested first.
+    return run_pipeline(
+        cdc_key=cdc_key,
+        run_id="testing",
+        max_workers=max_workers,
+        max_workers_per_source=max_workers_per_source,
+        use_processes=use_processes,
+    )
+
+
+@router.get("/enrich_tables")
+def enrich_tables(
+    cdc_key: int,
+    response: Response,
+    background: bool = False,
+    session: Session = Depends(get_session),
+):
+    try:
+        validate_cdc_key(cdc_key)
+    except ValueError as exception:
+        raise HTTPException(400, detail=str(exception))
+    if background:
+
+        def run_job(job: Job) -> None:
+            with Session(engine) as job_session:
+                enrich_stage_tables(
+                    job_session,
+                    cdc_key=cdc_key,
+                    run_id=job.id,
+                    on_tables_resolved=set_tables_total(job),
+                )
+
+        response.status_code = 202
+        return job_manager.submit("enrich_tables", run_job, cdc_key=cdc_key)
+
+    enrich_stage_tables(session, cdc_key=cdc_key, run_id="testing")
+
+
+@router.get("/queue_tables")
+def queue_tables(
+    stage_name: str = "raw",
+    cdc_key: int | None = None,
+    max_attempts: int = 3,
+    session: Session = Depends(get_session),
+):
+    # Key that indicates the timestamp of ingestion.
+    cdc_key = cdc_key or round(datetime.now().timestamp())
+    try:
+        number_of_work_items = enqueue_stage_tables(
+            session,
+            stage_name=stage_name,
             cdc_key=cdc_key,
             run_id="testing",
+            max_attempts=max_attempts,
         )
-        db_stage_log = stage_log_crud.open_stage_log(
-            session=session, stage_log=stage_log
-        )
-        db_table = table_crud.select_on_pk(session, model_id=table.id)
-        success, number_of_records_processed = ingest_table(session, db_table, cdc_key)
-        stage_log = StageLog.Close(
-            id=db_stage_log.id,
-            success=success,
-            number_of_records_processed=number_of_records_processed,
-        )
-        stage_log_crud.close_stage_log(session=session, stage_log=stage_log)
+    except ValueError as exception:
+        raise HTTPException(400, detail=str(exception))
+    return {"cdc_key": cdc_key, "number_of_work_items": number_of_work_items}
 
-    return tables_to_process
 
+@router.get("/work_queue")
+def get_work_queue(
+    stage_name: str | None = None,
+    cdc_key: int | None = None,
+    session: Session = Depends(get_session),
+):
+    stage_id = None
+    if stage_name is not None:
+        stage_id = stage_crud.select_cached_on_natural_key(session, name=stage_name).id
+    return work_item_crud.count_by_status(session, stage_id=stage_id, cdc_key=cdc_key)
 
-@router.get("/enrich_tables")
-def enrich_tables(cdc_key: int, session: Session = Depends(get_session)):
-    db_stage_raw = session.exec(select(Stage).where(Stage.name == "raw")).first()
-    db_stage_enriched = session.exec(
-        select(Stage).where(Stage.name == "enriched")
-    ).first()
-
-    ingestion_to_process: List[StageLog] = session.exec(
-        select(StageLog).where(
-            StageLog.stage_id == db_stage_raw.id,
-            StageLog.number_of_records_processed > 0,
-            StageLog.cdc_key == cdc_key,
-            StageLog.success,
-        )
-    ).all()
-
-    for ingestion in ingestion_to_process:
-        # check if enriched table exists:
-        db_enriched_table = session.exec(
-            select(Table).where(
-                Table.stage_id == db_stage_enriched.id,
-                Table.source_id == ingestion.stage_log_table.source_id,
-                Table.name == ingestion.stage_log_table.name,
-            )
-        ).first()
-
-        if not db_enriched_table:
-            db_raw_table = table_crud.select_on_pk(session, ingestion.table_id)
-            enriched_table = Table.Create(
-                name=db_raw_table.name,
-                source_location=f"raw/{db_raw_table.table_source.name}/{db_raw_table.name}",
-                stage_id=db_stage_enriched.id,
-                source_id=db_raw_table.source_id,
+
+@router.get("/drain_work_queue", response_model=List[TableProcessingResult] | Job)
+def drain_work_queue(
+    response: Response,
+    stage_name: str = "raw",
+    cdc_key: int | None = None,
+    max_workers: int = 4,
+    use_processes: bool = False,
+    background: bool = False,
+):
+    if background:
+
+        def run_job(job: Job) -> List[TableProcessingResult]:
+            return drain_work_queue_concurrently(
+                stage_name,
+                cdc_key=cdc_key,
+                max_workers=max_workers,
+                use_processes=use_processes,
             )
-            db_enriched_table = table_crud.insert_into_table(session, enriched_table)
 
-        stage_log = StageLog.Open(
-            table_id=db_enriched_table.id,
-            stage_id=db_enriched_table.stage_id,
-            cdc_key=cdc_key,
-            run_id="testing",
-        )
-        db_stage_log = stage_log_crud.open_stage_log(
-            session=session, stage_log=stage_log
-        )
+        response.status_code = 202
+        return job_manager.submit("drain_work_queue", run_job, cdc_key=cdc_key)
 
-        success, number_of_records_processed = enrich_table(db_enriched_table, cdc_key)
-        stage_log = StageLog.Close(
-            id=db_stage_log.id,
-            success=success,
-            number_of_records_processed=number_of_records_processed,
-        )
-        stage_log_crud.close_stage_log(session=session, stage_log=stage_log)
+    return drain_work_queue_concurrently(
+        stage_name,
+        cdc_key=cdc_key,
+        max_workers=max_workers,
+        use_processes=use_processes,
+    )
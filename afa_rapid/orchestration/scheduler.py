@@ -0,0 +1,243 @@
+from ...rapid.rapid_db.database import engine
+from ...rapid.rapid_db.models.catalog import Table, Stage
+from ...rapid.rapid_db.models.rapid_logging import StageLog
+from ...rapid.rapid_db.crud.catalog import table_crud, stage_crud
+from ...rapid.rapid_db.crud.rapid_logging import stage_log_crud
+from sqlalchemy import and_
+from sqlalchemy.orm import aliased, contains_eager, joinedload
+from sqlmodel import Session, select
+from typing import Callable, List, NamedTuple, Sequence, Tuple
+from .logic import (
+    ProcessTable,
+    ingest_table,
+    enrich_table,
+    process_tables_concurrently,
+    schedule_table_jobs,
+    TableJob,
+    TableProcessingResult,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class PipelineStage(NamedTuple):
+    name: str
+    process_table: ProcessTable
+
+
+# Every table flows through the stages in order, a table is processed in a stage as soon
+# as it was processed successfully, with records, in the stage before it.
+DEFAULT_PIPELINE = [
+    PipelineStage("raw", ingest_table),
+    PipelineStage("enriched", enrich_table),
+]
+
+
+def get_or_create_stage_table(
+    session: Session, db_table: Table, db_stage: Stage
+) -> Table:
+    db_stage_table = session.exec(
+        select(Table).where(
+            Table.stage_id == db_stage.id,
+            Table.source_id == db_table.source_id,
+            Table.name == db_table.name,
+        )
+    ).first()
+
+    if not db_stage_table:
+        # The next stage reads from the location the previous stage wrote to.
+        stage_table = Table.Create(
+            name=db_table.name,
+            source_location=f"{db_table.table_stage.name}/{db_table.table_source.name}/{db_table.name}",
+            stage_id=db_stage.id,
+            source_id=db_table.source_id,
+        )
+        db_stage_table = table_crud.insert_into_table(session, stage_table)
+    return db_stage_table
+
+
+def resolve_next_stage_tables(
+    session: Session, db_stage: Stage, db_next_stage: Stage, cdc_key: int
+) -> List[Tuple[StageLog, Table]]:
+    stage_table = aliased(Table)
+    next_stage_table = aliased(Table)
+    # All successful stage_logs of a cdc_key with their table, source and matching next
+    # stage table in a single query, instead of several lazy loads per stage_log.
+    statement = (
+        select(StageLog, next_stage_table)
+        .join(stage_table, StageLog.stage_log_table.of_type(stage_table))
+        .outerjoin(
+            next_stage_table,
+            and_(
+                next_stage_table.stage_id == db_next_stage.id,
+                next_stage_table.source_id == stage_table.source_id,
+                next_stage_table.name == stage_table.name,
+            ),
+        )
+        .where(
+            StageLog.stage_id == db_stage.id,
+            StageLog.number_of_records_processed > 0,
+            StageLog.cdc_key == cdc_key,
+            StageLog.success,
+        )
+        .options(
+            contains_eager(StageLog.stage_log_table.of_type(stage_table)).joinedload(
+                stage_table.table_source
+            ),
+            joinedload(next_stage_table.table_source),
+        )
+        .order_by(StageLog.id)
+    )
+    resolved = session.exec(statement).unique().all()
+
+    missing_tables = {}
+    for db_stage_log, db_next_stage_table in resolved:
+        db_table = db_stage_log.stage_log_table
+        if db_next_stage_table is None:
+            # The next stage reads from the location the previous stage wrote to.
+            missing_tables[(db_table.source_id, db_table.name)] = Table.Create(
+                name=db_table.name,
+                source_location=f"{db_stage.name}/{db_table.table_source.name}/{db_table.name}",
+                stage_id=db_next_stage.id,
+                source_id=db_table.source_id,
+            )
+
+    if missing_tables:
+        table_crud.insert_many(session, list(missing_tables.values()))
+        resolved = session.exec(statement).unique().all()
+
+    # The resolved objects are fully loaded, detaching them keeps later commits from
+    # expiring them and lazily reloading every table. Other objects of the session stay
+    # attached.
+    for db_stage_log, db_next_stage_table in resolved:
+        db_table = db_stage_log.stage_log_table
+        for db_object in (
+            db_stage_log,
+            db_table,
+            db_table.table_source,
+            db_next_stage_table,
+            db_next_stage_table.table_source,
+        ):
+            if db_object in session:
+                session.expunge(db_object)
+    return [tuple(row) for row in resolved]
+
+
+def ingest_stage_tables(
+    session: Session,
+    cdc_key: int,
+    run_id: str | None = None,
+    max_workers: int = 4,
+    max_workers_per_source: int = 2,
+    use_processes: bool = False,
+    on_tables_resolved: Callable[[int], None] | None = None,
+) -> List[TableProcessingResult]:
+    db_stage_raw = stage_crud.select_cached_on_natural_key(session, name="raw")
+    tables_to_process = session.exec(
+        select(Table).where(Table.stage_id == db_stage_raw.id)
+    ).all()
+    if on_tables_resolved is not None:
+        on_tables_resolved(len(tables_to_process))
+
+    # Tables are independent of each other, so they are ingested in parallel. Every
+    # ingestion opens and closes its own stage_log.
+    return process_tables_concurrently(
+        ingest_table,
+        tables_to_process,
+        cdc_key=cdc_key,
+        run_id=run_id,
+        max_workers=max_workers,
+        max_workers_per_source=max_workers_per_source,
+        use_processes=use_processes,
+    )
+
+
+def enrich_stage_tables(
+    session: Session,
+    cdc_key: int,
+    run_id: str | None = None,
+    on_tables_resolved: Callable[[int], None] | None = None,
+) -> None:
+    db_stage_raw = stage_crud.select_cached_on_natural_key(session, name="raw")
+    db_stage_enriched = stage_crud.select_cached_on_natural_key(
+        session, name="enriched"
+    )
+
+    ingestions_to_process = resolve_next_stage_tables(
+        session, db_stage_raw, db_stage_enriched, cdc_key
+    )
+    if on_tables_resolved is not None:
+        on_tables_resolved(len(ingestions_to_process))
+
+    for _, db_enriched_table in ingestions_to_process:
+        stage_log = StageLog.Open(
+            table_id=db_enriched_table.id,
+            stage_id=db_enriched_table.stage_id,
+            cdc_key=cdc_key,
+            run_id=run_id,
+        )
+        db_stage_log = stage_log_crud.open_stage_log(
+            session=session, stage_log=stage_log
+        )
+
+        success, number_of_records_processed = enrich_table(db_enriched_table, cdc_key)
+        stage_log = StageLog.Close(
+            id=db_stage_log.id,
+            success=success,
+            number_of_records_processed=number_of_records_processed,
+        )
+        stage_log_crud.close_stage_log(session=session, stage_log=stage_log)
+
+
+def run_pipeline(
+    cdc_key: int,
+    run_id: str | None = None,
+    pipeline: Sequence[PipelineStage] = DEFAULT_PIPELINE,
+    max_workers: int = 4,
+    max_workers_per_source: int = 2,
+    use_processes: bool = False,
+) -> List[TableProcessingResult]:
+    with Session(engine) as session:
+        db_stages = [
+            stage_crud.select_cached_on_natural_key(session, name=stage.name)
+            for stage in pipeline
+        ]
+        next_stages = {
+            db_stage.id: (db_next_stage, next_stage)
+            for db_stage, db_next_stage, next_stage in zip(
+                db_stages, db_stages[1:], pipeline[1:]
+            )
+        }
+        tables_to_process = session.exec(
+            select(Table).where(Table.stage_id == db_stages[0].id)
+        ).all()
+
+        def schedule_next_stage(result: TableProcessingResult) -> List[TableJob]:
+            if not result.success or not result.number_of_records_processed:
+                return []
+            if result.stage_id not in next_stages:
+                return []
+
+            db_next_stage, next_stage = next_stages[result.stage_id]
+            db_table = table_crud.select_on_pk(session, result.table_id)
+            db_next_table = get_or_create_stage_table(session, db_table, db_next_stage)
+            return [
+                TableJob(
+                    db_next_table.source_id, next_stage.process_table, db_next_table.id
+                )
+            ]
+
+        return schedule_table_jobs(
+            [
+                TableJob(table.source_id, pipeline[0].process_table, table.id)
+                for table in tables_to_process
+            ],
+            cdc_key=cdc_key,
+            run_id=run_id,
+            max_workers=max_workers,
+            max_workers_per_source=max_workers_per_source,
+            use_processes=use_processes,
+            on_result=schedule_next_stage,
+        )
@@ -0,0 +1,84 @@
+import polars as pl
+from ...rapid.rapid_db.models.catalog import Table
+from ...rapid.rapid_db.type_mapping import DataTypeResolver
+from typing import Dict
+
+PARQUET_TYPES = {
+    "string": pl.Utf8,
+    "utf8": pl.Utf8,
+    "boolean": pl.Boolean,
+    "bool": pl.Boolean,
+    "int8": pl.Int8,
+    "int16": pl.Int16,
+    "int32": pl.Int32,
+    "int64": pl.Int64,
+    "uint8": pl.UInt8,
+    "uint16": pl.UInt16,
+    "uint32": pl.UInt32,
+    "uint64": pl.UInt64,
+    "float": pl.Float32,
+    "float32": pl.Float32,
+    "double": pl.Float64,
+    "float64": pl.Float64,
+    "date": pl.Date,
+    "time": pl.Time,
+    "timestamp": pl.Datetime,
+    "datetime": pl.Datetime,
+    "binary": pl.Binary,
+}
+
+
+def to_polars_data_type(
+    parquet_type: str, precision: int | None = None, scale: int | None = None
+) -> pl.DataType:
+    parquet_type = parquet_type.lower()
+    if parquet_type == "decimal":
+        return pl.Decimal(precision=precision, scale=scale or 0)
+    if parquet_type not in PARQUET_TYPES:
+        raise ValueError(f"Unsupported parquet_type: {parquet_type}")
+    return PARQUET_TYPES[parquet_type]
+
+
+def resolve_type_column(
+    resolver: DataTypeResolver,
+    source_id: int,
+    source_data_types: pl.Series,
+    target: str = "parquet_type",
+) -> pl.Series:
+    # The whole column is translated with one join on the compiled mappings of the source,
+    # types without a mapping become null.
+    mappings = resolver.get_source_mappings(source_id)
+    df_mappings = pl.DataFrame(
+        {
+            "source_data_type": list(mappings),
+            target: [getattr(mapping, target) for mapping in mappings.values()],
+        },
+        schema={"source_data_type": pl.Utf8, target: pl.Utf8},
+    )
+    return (
+        source_data_types.cast(pl.Utf8)
+        .to_frame("source_data_type")
+        .with_row_index("row_index")
+        .join(df_mappings, on="source_data_type", how="left")
+        .sort("row_index")
+        .get_column(target)
+        .rename(source_data_types.name)
+    )
+
+
+def get_polars_schema(
+    resolver: DataTypeResolver, db_table: Table
+) -> Dict[str, pl.DataType]:
+    columns = sorted(
+        (column for column in db_table.table_columns if column.is_active),
+        key=lambda column: column.id,
+    )
+    data_type_mappings = resolver.resolve_columns(columns)
+    return {
+        column.name: to_polars_data_type(
+            data_type_mappings[column.name].parquet_type,
+            precision=column.precision,
+            scale=column.scale,
+        )
+        for column in columns
+    }
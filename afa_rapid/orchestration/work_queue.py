@@ -0,0 +1,172 @@
+from ...rapid.rapid_db.database import engine
+from ...rapid.rapid_db.models.catalog import Table
+from ...rapid.rapid_db.models.work_queue import WorkItem
+from ...rapid.rapid_db.crud.catalog import stage_crud
+from ...rapid.rapid_db.crud.work_queue import LeaseHeartbeat, work_item_crud
+from ...rapid.rapid_db.watermark import validate_cdc_key
+from concurrent.futures import as_completed
+from sqlmodel import Session, select
+from typing import Dict, List
+from .logic import (
+    ProcessTable,
+    TableProcessingResult,
+    create_executor,
+    process_table_with_stage_log,
+)
+from .scheduler import DEFAULT_PIPELINE
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+PROCESS_TABLE_PER_STAGE: Dict[str, ProcessTable] = {
+    stage.name: stage.process_table for stage in DEFAULT_PIPELINE
+}
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+
+def enqueue_stage_tables(
+    session: Session,
+    stage_name: str,
+    cdc_key: int,
+    run_id: str | None = None,
+    max_attempts: int = 3,
+) -> int:
+    validate_cdc_key(cdc_key)
+    db_stage = stage_crud.select_cached_on_natural_key(session, name=stage_name)
+    table_ids = session.exec(
+        select(Table.id).where(Table.stage_id == db_stage.id, Table.is_active)
+    ).all()
+    return work_item_crud.enqueue_many(
+        session,
+        [
+            WorkItem.Enqueue(
+                table_id=table_id,
+                stage_id=db_stage.id,
+                cdc_key=cdc_key,
+                run_id=run_id,
+                max_attempts=max_attempts,
+            )
+            for table_id in table_ids
+        ],
+    )
+
+
+def drain_work_queue(
+    stage_name: str,
+    cdc_key: int | None = None,
+    worker_id: str | None = None,
+    lease_seconds: float | None = None,
+    wait_for_retries: bool = False,
+    poll_interval: float = 5.0,
+) -> List[TableProcessingResult]:
+    # Claims and processes work_items of the stage until none is claimable, any number of
+    # workers in any number of processes can drain the same queue. When waiting for
+    # retries the worker only stops once no item is pending or running anymore.
+    process_table = PROCESS_TABLE_PER_STAGE[stage_name]
+    worker_id = worker_id or get_worker_id()
+    results = []
+    with Session(engine) as session:
+        db_stage = stage_crud.select_cached_on_natural_key(session, name=stage_name)
+        while True:
+            work_item_crud.fail_exhausted(session)
+            db_work_item = work_item_crud.claim(
+                session,
+                worker_id=worker_id,
+                stage_id=db_stage.id,
+                cdc_key=cdc_key,
+                lease_seconds=lease_seconds,
+            )
+            if db_work_item is None:
+                if not wait_for_retries:
+                    return results
+                counts = work_item_crud.count_by_status(
+                    session, stage_id=db_stage.id, cdc_key=cdc_key
+                )
+                if counts["pending"] + counts["running"] == 0:
+                    return results
+                time.sleep(poll_interval)
+                continue
+
+            try:
+                with LeaseHeartbeat(
+                    work_item_crud,
+                    lambda: Session(engine),
+                    db_work_item.id,
+                    worker_id,
+                    lease_seconds=lease_seconds,
+                ):
+                    result = process_table_with_stage_log(
+                        process_table,
+                        db_work_item.table_id,
+                        db_work_item.cdc_key,
+                        db_work_item.run_id,
+                    )
+            except Exception as exception:
+                # The stage_log could not be opened or closed for this table.
+                logger.error(
+                    f"Failed to process table with ID: {db_work_item.table_id} with error message: {exception}"
+                )
+                result = TableProcessingResult(
+                    table_id=db_work_item.table_id, error=str(exception)
+                )
+
+            try:
+                work_item_crud.complete(
+                    session,
+                    WorkItem.Complete(
+                        id=db_work_item.id,
+                        worker_id=worker_id,
+                        success=result.success,
+                        stage_log_id=result.stage_log_id,
+                        number_of_records_processed=result.number_of_records_processed,
+                        error=result.error,
+                    ),
+                )
+            except ValueError as exception:
+                # The lease was lost, the worker that holds it now completes the item.
+                session.rollback()
+                logger.warning(
+                    f"Could not complete work_item with ID: {db_work_item.id} with error message: {exception}"
+                )
+            results.append(result)
+
+
+def drain_work_queue_concurrently(
+    stage_name: str,
+    cdc_key: int | None = None,
+    max_workers: int = 4,
+    use_processes: bool = False,
+    lease_seconds: float | None = None,
+    wait_for_retries: bool = False,
+    poll_interval: float = 5.0,
+) -> List[TableProcessingResult]:
+    results = []
+    with create_executor(max_workers, use_processes=use_processes) as executor:
+        futures = [
+            executor.submit(
+                drain_work_queue,
+                stage_name,
+                cdc_key=cdc_key,
+                lease_seconds=lease_seconds,
+                wait_for_retries=wait_for_retries,
+                poll_interval=poll_interval,
+            )
+            for _ in range(max_workers)
+        ]
+        # A failing worker does not drop the results of the others.
+        for future in as_completed(futures):
+            try:
+                results.extend(future.result())
+            except Exception as exception:
+                logger.error(
+                    f"Worker failed to drain the work_queue of stage: {stage_name} with error message: {exception}"
+                )
+    return results
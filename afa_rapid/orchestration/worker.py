@@ -0,0 +1,107 @@
+from ...rapid.rapid_db.database import engine
+from ...rapid.rapid_db.crud.catalog import stage_crud
+from ...rapid.rapid_db.crud.work_queue import work_item_crud
+from ...rapid.rapid_db.watermark import validate_cdc_key
+from datetime import datetime
+from sqlmodel import Session
+from typing import List
+from .work_queue import (
+    PROCESS_TABLE_PER_STAGE,
+    drain_work_queue_concurrently,
+    enqueue_stage_tables,
+)
+import argparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def parse_arguments(arguments: List[str] | None = None) -> argparse.Namespace:
+    # Run as a module of the package afa_rapid is deployed in, its relative imports of
+    # rapid_db do not resolve from a console script:
+    # python -m <package>.afa_rapid.orchestration.worker --stage raw
+    parser = argparse.ArgumentParser(
+        description="Drain the work queue of a stage with several worker processes.",
+    )
+    parser.add_argument(
+        "--stage", default="raw", choices=sorted(PROCESS_TABLE_PER_STAGE)
+    )
+    parser.add_argument(
+        "--cdc-key",
+        type=int,
+        default=None,
+        help="Unix timestamp in seconds of the load to process, "
+        "with --enqueue a new load by default.",
+    )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Enqueue the tables of the stage before draining.",
+    )
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--lease-seconds", type=float, default=None)
+    parser.add_argument(
+        "--wait-for-retries",
+        action="store_true",
+        help="Keep polling until no work item is pending or running anymore.",
+    )
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--run-id", default=None)
+    return parser.parse_args(arguments)
+
+
+def main(arguments: List[str] | None = None) -> int:
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    arguments = parse_arguments(arguments)
+    if arguments.processes < 1:
+        raise SystemExit("--processes must be positive")
+
+    cdc_key = arguments.cdc_key
+    if cdc_key is not None:
+        try:
+            validate_cdc_key(cdc_key)
+        except ValueError as exception:
+            raise SystemExit(str(exception))
+    if arguments.enqueue:
+        # Key that indicates the timestamp of ingestion.
+        cdc_key = cdc_key or round(datetime.now().timestamp())
+        with Session(engine) as session:
+            number_of_work_items = enqueue_stage_tables(
+                session,
+                stage_name=arguments.stage,
+                cdc_key=cdc_key,
+                run_id=arguments.run_id,
+                max_attempts=arguments.max_attempts,
+            )
+        print(f"Enqueued {number_of_work_items} work_items with cdc_key: {cdc_key}")
+
+    # Every worker process builds its own engine and sessions, the parent only waits.
+    results = drain_work_queue_concurrently(
+        arguments.stage,
+        cdc_key=cdc_key,
+        max_workers=arguments.processes,
+        use_processes=True,
+        lease_seconds=arguments.lease_seconds,
+        wait_for_retries=arguments.wait_for_retries,
+        poll_interval=arguments.poll_interval,
+    )
+
+    with Session(engine) as session:
+        db_stage = stage_crud.select_cached_on_natural_key(
+            session, name=arguments.stage
+        )
+        counts = work_item_crud.count_by_status(
+            session, stage_id=db_stage.id, cdc_key=cdc_key
+        )
+    print(
+        f"Processed {len(results)} work_items, "
+        + ", ".join(f"{status}: {count}" for status, count in counts.items())
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+import polars as pl
+from ...rapid.rapid_db.models.rapid_logging import StageLog, StageLogMessage
+from ...rapid.rapid_db.crud.rapid_logging import stage_log_crud
+from datetime import datetime, timedelta
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.sql.expression import Select
+from typing import Dict
+import glob
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+ARCHIVE_ROOT = os.environ.get("RAPID_ARCHIVE_ROOT", "archive")
+
+STAGE_LOG_SCHEMA = {
+    "id": pl.Int64,
+    "table_id": pl.Int64,
+    "stage_id": pl.Int64,
+    "cdc_key": pl.Int64,
+    "datetime_started": pl.Datetime("us"),
+    "is_open": pl.Boolean,
+    "run_id": pl.Utf8,
+    "datetime_ended": pl.Datetime("us"),
+    "success": pl.Boolean,
+    "number_of_records_processed": pl.Int64,
+}
+STAGE_LOG_MESSAGE_SCHEMA = {
+    "id": pl.Int64,
+    "stage_log_id": pl.Int64,
+    "message": pl.Utf8,
+    "is_error": pl.Boolean,
+    "datetime_stage_log_message": pl.Datetime("us"),
+}
+
+
+def select_schema(model: SQLModel, schema: Dict[str, pl.DataType]) -> Select:
+    # The frames are built positionally, so the columns are selected in schema order.
+    return select(*[model.__table__.c[name] for name in schema])
+
+
+def read_frame(session: Session, statement, schema: Dict[str, pl.DataType]):
+    # Rows are read as plain tuples into a frame, no model is built per row.
+    return pl.DataFrame(
+        [tuple(row) for row in session.execute(statement)],
+        schema=schema,
+        orient="row",
+    )
+
+
+def _write_partitions(df: pl.DataFrame, location: str, file_name: str) -> None:
+    # One directory per day the stage_logs started, the file name holds the first and last
+    # stage_log ID of the batch. A rerun with other batch boundaries writes the same rows
+    # to new files, so readers drop duplicate IDs.
+    for (partition_date,), df_partition in df.group_by("date"):
+        partition_location = os.path.join(location, f"date={partition_date}")
+        os.makedirs(partition_location, exist_ok=True)
+        df_partition.drop("date").write_parquet(
+            os.path.join(partition_location, file_name)
+        )
+
+
+def archive_stage_logs(
+    session: Session,
+    older_than_days: int = 90,
+    archive_root: str = ARCHIVE_ROOT,
+    batch_size: int = 10000,
+) -> dict:
+    # Closed stage_logs started before the cutoff are written with their messages to
+    # Parquet, and only removed from the database after their batch is written.
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    number_of_stage_logs = 0
+    number_of_stage_log_messages = 0
+    last_id = 0
+    while True:
+        df_stage_logs = read_frame(
+            session,
+            select_schema(StageLog, STAGE_LOG_SCHEMA)
+            .where(
+                ~StageLog.is_open,
+                StageLog.datetime_started < cutoff,
+                StageLog.id > last_id,
+            )
+            .order_by(StageLog.id)
+            .limit(batch_size),
+            STAGE_LOG_SCHEMA,
+        )
+        if df_stage_logs.is_empty():
+            break
+        stage_log_ids = df_stage_logs.get_column("id").to_list()
+        last_id = stage_log_ids[-1]
+        df_stage_log_messages = read_frame(
+            session,
+            select_schema(StageLogMessage, STAGE_LOG_MESSAGE_SCHEMA)
+            .where(StageLogMessage.stage_log_id.in_(stage_log_ids))
+            .order_by(StageLogMessage.id),
+            STAGE_LOG_MESSAGE_SCHEMA,
+        )
+
+        df_stage_logs = df_stage_logs.with_columns(
+            pl.col("datetime_started").dt.date().alias("date")
+        )
+        file_name = f"{stage_log_ids[0]}-{last_id}.parquet"
+        _write_partitions(
+            df_stage_logs, os.path.join(archive_root, "stage_logs"), file_name
+        )
+        _write_partitions(
+            df_stage_log_messages.join(
+                df_stage_logs.select(pl.col("id").alias("stage_log_id"), "date"),
+                on="stage_log_id",
+            ),
+            os.path.join(archive_root, "stage_log_messages"),
+            file_name,
+        )
+
+        stage_log_crud.delete_stage_logs(session, stage_log_ids)
+        number_of_stage_logs += len(stage_log_ids)
+        number_of_stage_log_messages += len(df_stage_log_messages)
+        logger.info(
+            f"Archived {len(stage_log_ids)} stage_logs up to ID: {last_id} to: {archive_root}"
+        )
+
+    return {
+        "ok": True,
+        "number_of_stage_logs": number_of_stage_logs,
+        "number_of_stage_log_messages": number_of_stage_log_messages,
+    }
+
+
+def scan_archive(archive_root: str, table_name: str, schema) -> pl.LazyFrame:
+    location = os.path.join(archive_root, table_name)
+    if not glob.glob(os.path.join(location, "date=*", "*.parquet")):
+        return pl.LazyFrame(schema=schema)
+    return pl.scan_parquet(
+        os.path.join(location, "date=*", "*.parquet"), hive_partitioning=False
+    )
+
+
+def get_stage_log_history(
+    session: Session,
+    table_id: int,
+    stage_id: int | None = None,
+    archive_root: str = ARCHIVE_ROOT,
+) -> pl.DataFrame:
+    # The stage_logs of a table from the database and the archive together, the caller
+    # does not need to know where a stage_log lives.
+    statement = select_schema(StageLog, STAGE_LOG_SCHEMA).where(
+        StageLog.table_id == table_id
+    )
+    archive_filter = pl.col("table_id") == table_id
+    if stage_id is not None:
+        statement = statement.where(StageLog.stage_id == stage_id)
+        archive_filter = archive_filter & (pl.col("stage_id") == stage_id)
+
+    df_archived = (
+        scan_archive(archive_root, "stage_logs", STAGE_LOG_SCHEMA)
+        .filter(archive_filter)
+        .collect()
+    )
+    # A batch archived again after a crash can hold stage_logs already in other files or
+    # still in the database, the database row wins.
+    return (
+        pl.concat([df_archived, read_frame(session, statement, STAGE_LOG_SCHEMA)])
+        .unique(subset="id", keep="last", maintain_order=True)
+        .sort("id")
+    )
+
+
+def get_stage_log_messages_history(
+    session: Session, stage_log_id: int, archive_root: str = ARCHIVE_ROOT
+) -> pl.DataFrame:
+    df_stage_log_messages = read_frame(
+        session,
+        select_schema(StageLogMessage, STAGE_LOG_MESSAGE_SCHEMA).where(
+            StageLogMessage.stage_log_id == stage_log_id
+        ),
+        STAGE_LOG_MESSAGE_SCHEMA,
+    )
+    if df_stage_log_messages.is_empty():
+        df_stage_log_messages = (
+            scan_archive(archive_root, "stage_log_messages", STAGE_LOG_MESSAGE_SCHEMA)
+            .filter(pl.col("stage_log_id") == stage_log_id)
+            .unique(subset="id")
+            .collect()
+        )
+    return df_stage_log_messages.sort("id")
@@ -0,0 +1,166 @@
+import polars as pl
+from ...rapid.rapid_db.models.catalog import Table
+from ...rapid.rapid_db.models.rapid_logging import StageLog
+from datetime import datetime
+from sqlmodel import Session, select
+from typing import List
+import re
+from .archive import (
+    ARCHIVE_ROOT,
+    STAGE_LOG_SCHEMA,
+    read_frame,
+    scan_archive,
+    select_schema,
+)
+
+GROUP_BY_COLUMNS = {
+    "table": ["table_id", "stage_id"],
+    "stage": ["stage_id"],
+    "source": ["source_id", "stage_id"],
+    "run": ["run_id"],
+    "time": ["bucket"],
+}
+PERCENTILES = [0.5, 0.9, 0.99]
+
+
+def to_local_naive(value: datetime | None) -> datetime | None:
+    # stage_logs hold naive local datetimes, aware bounds are converted to compare with them.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def validate_bucket(bucket: str) -> str:
+    # Polars leaves every datetime as it is for a zero duration instead of failing.
+    amounts = [int(amount) for amount in re.findall(r"-?\d+", bucket)]
+    if not amounts or min(amounts) < 0 or max(amounts) == 0:
+        raise ValueError(f"400: bucket must be a positive duration, got: {bucket}.")
+    return bucket
+
+
+def read_closed_stage_logs(
+    session: Session,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    stage_id: int | None = None,
+    table_id: int | None = None,
+    include_archive: bool = False,
+    archive_root: str = ARCHIVE_ROOT,
+) -> pl.DataFrame:
+    since = to_local_naive(since)
+    until = to_local_naive(until)
+    statement = select_schema(StageLog, STAGE_LOG_SCHEMA).where(~StageLog.is_open)
+    archive_filter = ~pl.col("is_open")
+    if since is not None:
+        statement = statement.where(StageLog.datetime_started >= since)
+        archive_filter = archive_filter & (pl.col("datetime_started") >= since)
+    if until is not None:
+        statement = statement.where(StageLog.datetime_started < until)
+        archive_filter = archive_filter & (pl.col("datetime_started") < until)
+    if stage_id is not None:
+        statement = statement.where(StageLog.stage_id == stage_id)
+        archive_filter = archive_filter & (pl.col("stage_id") == stage_id)
+    if table_id is not None:
+        statement = statement.where(StageLog.table_id == table_id)
+        archive_filter = archive_filter & (pl.col("table_id") == table_id)
+
+    df_stage_logs = read_frame(session, statement, STAGE_LOG_SCHEMA)
+    if include_archive:
+        df_archived = (
+            scan_archive(archive_root, "stage_logs", STAGE_LOG_SCHEMA)
+            .filter(archive_filter)
+            .collect()
+        )
+        df_stage_logs = pl.concat([df_archived, df_stage_logs]).unique(
+            subset="id", keep="last"
+        )
+    return df_stage_logs
+
+
+def aggregate_throughput(
+    df_stage_logs: pl.DataFrame, group_by: List[str]
+) -> pl.DataFrame:
+    # All metrics are column expressions over the whole frame, one pass per group.
+    duration = pl.col("duration_seconds")
+    records = pl.col("number_of_records_processed")
+    return (
+        df_stage_logs.with_columns(
+            (pl.col("datetime_ended") - pl.col("datetime_started"))
+            .dt.total_microseconds()
+            .truediv(1_000_000)
+            .alias("duration_seconds")
+        )
+        .with_columns(
+            pl.when(duration > 0)
+            .then(records / duration)
+            .otherwise(None)
+            .alias("records_per_second")
+        )
+        .group_by(group_by)
+        .agg(
+            pl.len().alias("number_of_runs"),
+            pl.col("success").fill_null(False).sum().alias("number_of_successes"),
+            records.sum().alias("number_of_records_processed"),
+            duration.sum().alias("total_duration_seconds"),
+            duration.mean().alias("mean_duration_seconds"),
+            *[
+                duration.quantile(percentile, interpolation="linear").alias(
+                    f"p{round(percentile * 100)}_duration_seconds"
+                )
+                for percentile in PERCENTILES
+            ],
+            (records.sum() / duration.sum()).alias("records_per_second"),
+            *[
+                pl.col("records_per_second")
+                .quantile(percentile, interpolation="linear")
+                .alias(f"p{round(percentile * 100)}_records_per_second")
+                for percentile in PERCENTILES
+            ],
+            pl.col("datetime_started").min().alias("first_datetime_started"),
+            pl.col("datetime_started").max().alias("last_datetime_started"),
+        )
+        .sort(group_by, nulls_last=True)
+    )
+
+
+def get_throughput_metrics(
+    session: Session,
+    group_by: str = "table",
+    bucket: str = "1d",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    stage_id: int | None = None,
+    table_id: int | None = None,
+    include_archive: bool = False,
+) -> pl.DataFrame:
+    if group_by not in GROUP_BY_COLUMNS:
+        raise ValueError(
+            f"400: group_by must be one of: {list(GROUP_BY_COLUMNS)}, got: {group_by}."
+        )
+    if group_by == "time":
+        validate_bucket(bucket)
+    df_stage_logs = read_closed_stage_logs(
+        session,
+        since=since,
+        until=until,
+        stage_id=stage_id,
+        table_id=table_id,
+        include_archive=include_archive,
+    )
+
+    if group_by == "source":
+        df_tables = read_frame(
+            session,
+            select(Table.id, Table.source_id),
+            {"table_id": pl.Int64, "source_id": pl.Int64},
+        )
+        df_stage_logs = df_stage_logs.join(df_tables, on="table_id", how="left")
+    if group_by == "time":
+        try:
+            df_stage_logs = df_stage_logs.with_columns(
+                pl.col("datetime_started").dt.truncate(bucket).alias("bucket")
+            )
+        except pl.exceptions.PolarsError:
+            raise ValueError(f"400: invalid bucket: {bucket}.")
+
+    return aggregate_throughput(df_stage_logs, GROUP_BY_COLUMNS[group_by])
@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from ...rapid.rapid_db.database import get_session
-from ...rapid.rapid_db.crud.rapid_logging import (
-    stage_log_crud,
-    stage_log_message_crud,
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from ...rapid.rapid_db.async_database import get_async_session
+from ...rapid.rapid_db.database import engine, get_session
+from ...rapid.rapid_db.partitioning import maintain_partitions, migrate_to_partitioned
+from ...rapid.rapid_db.crud.async_rapid_logging import (
+    async_stage_log_crud,
+    async_stage_log_message_crud,
 )
-from ...rapid.rapid_db.models.rapid_logging import StageLog, StageLogMessage
-from sqlmodel import Session
+from ...rapid.rapid_db.crud.buffered_rapid_logging import (
+    buffered_stage_log_message_writer,
+)
+from ...rapid.rapid_db.models.rapid_logging import (
+    StageLog,
+    StageLogMessage,
+    StageLogSummary,
+)
+from datetime import datetime
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..jobs.logic import Job, job_manager
+from .metrics import get_throughput_metrics
+from .archive import (
+    archive_stage_logs,
+    get_stage_log_history,
+    get_stage_log_messages_history,
+)
+from typing import List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,13 +33,20 @@ logger.setLevel(logging.WARNING)
 router = APIRouter(prefix="/logging", tags=["logging"])
 
 
+class StageLogPage(SQLModel, table=False):
+    items: List[StageLog.Return]
+    next_cursor: str | None
+
+
 @router.post("/open_stage_log", response_model=StageLog.Return)
-def open_stage_log(stage_log: StageLog.Open, session: Session = Depends(get_session)):
+async def open_stage_log(
+    stage_log: StageLog.Open, session: AsyncSession = Depends(get_async_session)
+):
     logger.info(
         f"Request received to open a new stage_log for stage_id: {stage_log.stage_id}, and table_id: {stage_log.table_id}"
     )
     try:
-        db_stage_log = stage_log_crud.open_stage_log(
+        db_stage_log = await async_stage_log_crud.open_stage_log(
             session=session, stage_log=stage_log
         )
         logger.info(f"Succesfully opened a new stage_log with ID: {db_stage_log.id}")
@@ -35,10 +61,14 @@ def open_stage_log(stage_log: StageLog.Open, session: Session = Depends(get_sess
 
 
 @router.patch("/close_stage_log", response_model=StageLog.Return)
-def close_stage_log(stage_log: StageLog.Close, session=Depends(get_session)):
+async def close_stage_log(
+    stage_log: StageLog.Close, session: AsyncSession = Depends(get_async_session)
+):
     logger.info(f"Request received to close stage_log with ID: {stage_log.id}")
     try:
-        db_stage_log = stage_log_crud.close_stage_log(
+        # Buffered messages are written first, they are rejected once the log is closed.
+        await buffered_stage_log_message_writer.flush()
+        db_stage_log = await async_stage_log_crud.close_stage_log(
             session=session, stage_log=stage_log
         )
         logger.info(f"Succesfully closed stage_log with ID: {db_stage_log.id}")
@@ -54,14 +84,15 @@ def close_stage_log(stage_log: StageLog.Close, session=Depends(get_session)):
 
 
 @router.post("/add_stage_log_message", response_model=StageLogMessage.Return)
-def add_stage_log_message(
-    stage_log_message: StageLogMessage.Add, session=Depends(get_session)
+async def add_stage_log_message(
+    stage_log_message: StageLogMessage.Add,
+    session: AsyncSession = Depends(get_async_session),
 ):
     logging.info(
         f"Adding stage_log_message for stage_log with ID: {stage_log_message.stage_log_id}"
     )
     try:
-        db_stage_log_message = stage_log_message_crud.add_stage_log_message(
+        db_stage_log_message = await async_stage_log_message_crud.add_stage_log_message(
             session=session, stage_log_message=stage_log_message
         )
         logging.info(
@@ -75,3 +106,162 @@ def add_stage_log_message(
             503, f"Failed to add new stage_log_message with error message: {exception}"
         )
     return db_stage_log_message
+
+
+@router.post("/add_stage_log_messages")
+async def add_stage_log_messages(
+    stage_log_messages: List[StageLogMessage.Add],
+    session: AsyncSession = Depends(get_async_session),
+):
+    logger.info(f"Adding {len(stage_log_messages)} stage_log_messages")
+    try:
+        result = await async_stage_log_message_crud.add_many(
+            session=session, stage_log_messages=stage_log_messages
+        )
+        logger.info(f"Succesfully added {len(stage_log_messages)} stage_log_messages")
+    except Exception as exception:
+        logger.error(
+            f"Failed to add stage_log_messages with error message: {exception}"
+        )
+        return HTTPException(
+            503, f"Failed to add new stage_log_messages with error message: {exception}"
+        )
+    return result
+
+
+@router.post("/queue_stage_log_messages", status_code=202)
+async def queue_stage_log_messages(stage_log_messages: List[StageLogMessage.Add]):
+    # The messages are written in the background, this only waits when the buffer is full.
+    for stage_log_message in stage_log_messages:
+        await buffered_stage_log_message_writer.add(stage_log_message)
+    return {"ok": True, "number_of_stage_log_messages": len(stage_log_messages)}
+
+
+@router.get("/stage_logs", response_model=StageLogPage)
+async def get_stage_logs(
+    cursor: str | None = None,
+    limit: int = 100,
+    session: AsyncSession = Depends(get_async_session),
+):
+    try:
+        db_stage_logs, next_cursor = await async_stage_log_crud.get_stage_logs_page(
+            session=session, cursor=cursor, limit=limit
+        )
+    except ValueError as exception:
+        logger.warning(f"Failed to get stage_logs with error message: {exception}")
+        raise HTTPException(400, detail=str(exception))
+    return StageLogPage(items=db_stage_logs, next_cursor=next_cursor)
+
+
+@router.get("/stage_log_summaries", response_model=List[StageLogSummary.Return])
+async def get_stage_log_summaries(
+    stage_id: int | None = None,
+    table_id: List[int] | None = Query(default=None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    # The latest run per table and stage is read from the maintained summaries, one row
+    # per table and stage instead of a scan over all stage_logs.
+    return await async_stage_log_crud.get_stage_log_summaries(
+        session=session, stage_id=stage_id, table_ids=table_id
+    )
+
+
+@router.post("/rebuild_stage_log_summaries")
+async def rebuild_stage_log_summaries(
+    session: AsyncSession = Depends(get_async_session),
+):
+    number_of_summaries = await async_stage_log_crud.rebuild_stage_log_summaries(
+        session=session
+    )
+    return {"ok": True, "number_of_stage_log_summaries": number_of_summaries}
+
+
+@router.post("/archive_stage_logs")
+def archive_old_stage_logs(
+    response: Response,
+    older_than_days: int = 90,
+    background: bool = False,
+    session: Session = Depends(get_session),
+):
+    if background:
+
+        def run_job(job: Job) -> dict:
+            with Session(engine) as job_session:
+                return archive_stage_logs(job_session, older_than_days=older_than_days)
+
+        response.status_code = 202
+        return job_manager.submit("archive_stage_logs", run_job)
+
+    return archive_stage_logs(session, older_than_days=older_than_days)
+
+
+@router.get("/stage_log_history", response_model=List[StageLog.Return])
+def stage_log_history(
+    table_id: int,
+    stage_id: int | None = None,
+    session: Session = Depends(get_session),
+):
+    return get_stage_log_history(
+        session, table_id=table_id, stage_id=stage_id
+    ).to_dicts()
+
+
+@router.get("/stage_log_messages_history", response_model=List[StageLogMessage.Return])
+def stage_log_messages_history(
+    stage_log_id: int, session: Session = Depends(get_session)
+):
+    return get_stage_log_messages_history(session, stage_log_id=stage_log_id).to_dicts()
+
+
+@router.post("/maintain_partitions")
+def maintain_stage_log_message_partitions(
+    months_ahead: int = 3, retention_days: int | None = None
+):
+    # Only does something on Postgres, where stage_log_messages is partitioned per month.
+    try:
+        return maintain_partitions(
+            engine,
+            "stage_log_messages",
+            months_ahead=months_ahead,
+            retention_days=retention_days,
+        )
+    except ValueError as exception:
+        raise HTTPException(409, detail=str(exception))
+
+
+@router.post("/migrate_partitions")
+def migrate_stage_log_messages_to_partitioned(months_ahead: int = 3):
+    # One time for a database created before stage_log_messages was partitioned.
+    with engine.connect() as connection:
+        return migrate_to_partitioned(
+            connection, "stage_log_messages", months_ahead=months_ahead
+        )
+
+
+@router.get("/metrics")
+def get_metrics(
+    group_by: str = "table",
+    bucket: str = "1d",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    stage_id: int | None = None,
+    table_id: int | None = None,
+    include_archive: bool = False,
+    session: Session = Depends(get_session),
+):
+    # Durations and records per second of closed stage_logs, with percentiles, per table,
+    # stage, source, run or time bucket.
+    try:
+        df_metrics = get_throughput_metrics(
+            session,
+            group_by=group_by,
+            bucket=bucket,
+            since=since,
+            until=until,
+            stage_id=stage_id,
+            table_id=table_id,
+            include_archive=include_archive,
+        )
+    except ValueError as exception:
+        raise HTTPException(400, detail=str(exception))
+    return df_metrics.to_dicts()
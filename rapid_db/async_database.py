@@ -0,0 +1,51 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from functools import lru_cache
+from .database import DatabaseSettings, add_sqlite_pragmas
+
+# The async drivers are optional, they are only imported when an async engine is created.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def create_rapid_async_engine(settings: DatabaseSettings | None = None) -> AsyncEngine:
+    settings = settings or DatabaseSettings.from_env()
+    url = make_url(settings.url)
+    backend_name = url.get_backend_name()
+    if backend_name not in ASYNC_DRIVERS:
+        raise NotImplementedError(f"No async driver configured for: {backend_name}")
+    url = url.set(drivername=f"{backend_name}+{ASYNC_DRIVERS[backend_name]}")
+
+    if backend_name == "sqlite":
+        rapid_async_engine = create_async_engine(
+            url, echo=settings.echo, pool_pre_ping=settings.pool_pre_ping
+        )
+        add_sqlite_pragmas(rapid_async_engine.sync_engine, settings)
+    else:
+        rapid_async_engine = create_async_engine(
+            url,
+            echo=settings.echo,
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_pre_ping=settings.pool_pre_ping,
+            pool_recycle=settings.pool_recycle,
+        )
+
+    return rapid_async_engine
+
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    return create_rapid_async_engine()
+
+
+def create_async_session_maker(
+    async_engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    # Objects are not expired on commit, lazy refreshes are not possible outside of an await.
+    return async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_session():
+    async with create_async_session_maker(get_async_engine())() as session:
+        yield session
@@ -0,0 +1,121 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncIterator, Generic, List, Sequence, Tuple
+from .base import (
+    GenericCrud,
+    ModelType,
+    CreateSchemaType,
+    UpdateSchemaType,
+    ReturnSchemaType,
+)
+
+
+class AsyncGenericCrud(
+    Generic[ModelType, CreateSchemaType, UpdateSchemaType, ReturnSchemaType]
+):
+    # The sync crud is run on the greenlet of the AsyncSession, every query it emits is
+    # awaited on the async driver so the event loop is never blocked on the database.
+    def __init__(
+        self,
+        crud: GenericCrud[
+            ModelType, CreateSchemaType, UpdateSchemaType, ReturnSchemaType
+        ],
+    ):
+        self.crud = crud
+        self.model = crud.model
+        self.name = crud.name
+
+    async def insert_into_table(
+        self, session: AsyncSession, model: CreateSchemaType
+    ) -> ReturnSchemaType:
+        return await session.run_sync(self.crud.insert_into_table, model)
+
+    async def insert_many(
+        self,
+        session: AsyncSession,
+        models: Sequence[CreateSchemaType],
+        chunk_size: int = 1000,
+    ) -> List[int]:
+        return await session.run_sync(
+            self.crud.insert_many, models, chunk_size=chunk_size
+        )
+
+    async def sync_table(
+        self,
+        session: AsyncSession,
+        models: Sequence[CreateSchemaType],
+        deactivate_missing: bool = False,
+        chunk_size: int = 1000,
+    ) -> dict:
+        return await session.run_sync(
+            self.crud.sync_table,
+            models,
+            deactivate_missing=deactivate_missing,
+            chunk_size=chunk_size,
+        )
+
+    async def sync_rows(
+        self,
+        session: AsyncSession,
+        rows: Sequence[dict],
+        deactivate_missing: bool = False,
+        chunk_size: int = 1000,
+    ) -> dict:
+        return await session.run_sync(
+            self.crud.sync_rows,
+            rows,
+            deactivate_missing=deactivate_missing,
+            chunk_size=chunk_size,
+        )
+
+    async def select_all(
+        self, session: AsyncSession, offset: int = 0, limit: int = 100
+    ) -> List[ReturnSchemaType]:
+        return await session.run_sync(self.crud.select_all, offset=offset, limit=limit)
+
+    async def select_page(
+        self, session: AsyncSession, cursor: str | None = None, limit: int = 100
+    ) -> Tuple[List[ReturnSchemaType], str | None]:
+        return await session.run_sync(self.crud.select_page, cursor=cursor, limit=limit)
+
+    async def iter_all(
+        self, session: AsyncSession, yield_per: int = 1000
+    ) -> AsyncIterator[ReturnSchemaType]:
+        statement = (
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=yield_per)
+        )
+        async for db_model in await session.stream_scalars(statement):
+            yield db_model
+
+    async def select_on_pk(
+        self, session: AsyncSession, model_id: int
+    ) -> ReturnSchemaType:
+        return await session.run_sync(self.crud.select_on_pk, model_id)
+
+    async def select_cached_on_pk(
+        self, session: AsyncSession, model_id: int
+    ) -> ReturnSchemaType:
+        return await session.run_sync(self.crud.select_cached_on_pk, model_id)
+
+    async def select_cached_on_natural_key(
+        self, session: AsyncSession, **key
+    ) -> ReturnSchemaType:
+        return await session.run_sync(
+            lambda sync_session: self.crud.select_cached_on_natural_key(
+                sync_session, **key
+            )
+        )
+
+    async def update_table_on_pk(
+        self, session: AsyncSession, model: UpdateSchemaType
+    ) -> ReturnSchemaType:
+        return await session.run_sync(self.crud.update_table_on_pk, model)
+
+    async def delete_from_table(
+        self, session: AsyncSession, model_id: int, hard_delete: bool = False
+    ) -> dict:
+        return await session.run_sync(
+            self.crud.delete_from_table, model_id, hard_delete=hard_delete
+        )
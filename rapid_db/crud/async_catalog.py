@@ -0,0 +1,14 @@
+from .async_base import AsyncGenericCrud
+from .catalog import (
+    source_crud,
+    stage_crud,
+    table_crud,
+    column_crud,
+    data_type_mapping_crud,
+)
+
+async_source_crud = AsyncGenericCrud(source_crud)
+async_stage_crud = AsyncGenericCrud(stage_crud)
+async_table_crud = AsyncGenericCrud(table_crud)
+async_column_crud = AsyncGenericCrud(column_crud)
+async_data_type_mapping_crud = AsyncGenericCrud(data_type_mapping_crud)
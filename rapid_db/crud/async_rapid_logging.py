@@ -0,0 +1,96 @@
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.rapid_logging import StageLog, StageLogMessage, StageLogSummary
+from .rapid_logging import (
+    StageLogCrud,
+    StageLogMessageCrud,
+    stage_log_crud,
+    stage_log_message_crud,
+)
+from typing import List, Sequence, Tuple
+
+
+class AsyncStageLogCrud:
+    def __init__(self, crud: StageLogCrud):
+        self.crud = crud
+        self.name = crud.name
+
+    async def open_stage_log(
+        self, session: AsyncSession, stage_log: StageLog.Open
+    ) -> StageLog.Return:
+        return await session.run_sync(self.crud.open_stage_log, stage_log)
+
+    async def get_stage_log_on_id(
+        self, session: AsyncSession, stage_log_id: int
+    ) -> StageLog.Return:
+        return await session.run_sync(self.crud.get_stage_log_on_id, stage_log_id)
+
+    async def get_stage_logs_page(
+        self, session: AsyncSession, cursor: str | None = None, limit: int = 100
+    ) -> Tuple[List[StageLog.Return], str | None]:
+        return await session.run_sync(
+            self.crud.get_stage_logs_page, cursor=cursor, limit=limit
+        )
+
+    async def close_stage_log(
+        self, session: AsyncSession, stage_log: StageLog.Close
+    ) -> StageLog.Return:
+        return await session.run_sync(self.crud.close_stage_log, stage_log)
+
+    async def get_stage_log_summaries(
+        self,
+        session: AsyncSession,
+        stage_id: int | None = None,
+        table_ids: Sequence[int] | None = None,
+    ) -> List[StageLogSummary.Return]:
+        return await session.run_sync(
+            self.crud.get_stage_log_summaries, stage_id=stage_id, table_ids=table_ids
+        )
+
+    async def rebuild_stage_log_summaries(self, session: AsyncSession) -> int:
+        return await session.run_sync(self.crud.rebuild_stage_log_summaries)
+
+    async def delete_stage_log(self, session: AsyncSession, stage_log_id: int) -> dict:
+        return await session.run_sync(self.crud.delete_stage_log, stage_log_id)
+
+
+async_stage_log_crud = AsyncStageLogCrud(stage_log_crud)
+
+
+class AsyncStageLogMessageCrud:
+    def __init__(self, crud: StageLogMessageCrud):
+        self.crud = crud
+        self.name = crud.name
+
+    async def add_stage_log_message(
+        self, session: AsyncSession, stage_log_message: StageLogMessage.Add
+    ) -> StageLogMessage.Return:
+        return await session.run_sync(
+            self.crud.add_stage_log_message, stage_log_message
+        )
+
+    async def add_many(
+        self,
+        session: AsyncSession,
+        stage_log_messages: Sequence[StageLogMessage.Add],
+        chunk_size: int = 1000,
+    ) -> dict:
+        return await session.run_sync(
+            self.crud.add_many, stage_log_messages, chunk_size=chunk_size
+        )
+
+    async def get_stage_log_message_on_id(
+        self, session: AsyncSession, stage_log_message_id: int
+    ) -> StageLogMessage.Return:
+        return await session.run_sync(
+            self.crud.get_stage_log_message_on_id, stage_log_message_id
+        )
+
+    async def delete_stage_log_message(
+        self, session: AsyncSession, stage_log_message_id: int
+    ) -> dict:
+        return await session.run_sync(
+            self.crud.delete_stage_log_message, stage_log_message_id
+        )
+
+
+async_stage_log_message_crud = AsyncStageLogMessageCrud(stage_log_message_crud)
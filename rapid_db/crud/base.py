@@ -1,5 +1,13 @@
-from sqlmodel import Session, select, SQLModel
-from typing import Generic, TypeVar, List
+from sqlmodel import Session, select, SQLModel, insert, update
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Generic, TypeVar, List, Sequence, Tuple, Iterator
+from collections import Counter
+from datetime import datetime
+from ..cache import TTLCache
+from ..models.catalog import CatalogVersion
+import base64
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,13 +18,107 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound="SQLModel")
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound="SQLModel")
 ReturnSchemaType = TypeVar("ReturnSchemaType", bound="SQLModel")
 
+MAX_PAGE_LIMIT = 1000
+
+
+def get_upsert_insert(session: Session, model: SQLModel):
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "sqlite":
+        return sqlite.insert(model)
+    if dialect_name == "postgresql":
+        return postgresql.insert(model)
+    raise NotImplementedError(f"Upserts are not supported for dialect: {dialect_name}")
+
+
+def bump_catalog_version(session: Session) -> None:
+    # A single atomic upsert, so concurrent writers in other processes never lose a bump.
+    # It runs in the transaction of the write, the version only moves when it commits.
+    statement = get_upsert_insert(session, CatalogVersion).values(id=1, version=1)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CatalogVersion.id],
+            set_={"version": CatalogVersion.version + 1},
+        )
+    )
+
+
+def get_catalog_version(session: Session) -> int:
+    catalog_version = session.get(CatalogVersion, 1, populate_existing=True)
+    return catalog_version.version if catalog_version else 0
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"400: invalid cursor: {cursor}.")
+    if not isinstance(last_id, int):
+        raise ValueError(f"400: invalid cursor: {cursor}.")
+    return last_id
+
+
+def select_page(
+    session: Session, model: SQLModel, cursor: str | None = None, limit: int = 100
+) -> Tuple[List[SQLModel], str | None]:
+    # Keyset pagination on the indexed primary key, the cost of a page does not depend
+    # on how deep into the table it is.
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(
+            f"400: limit must be between 1 and {MAX_PAGE_LIMIT}, got: {limit}."
+        )
+    statement = select(model).order_by(model.id).limit(limit)
+    if cursor is not None:
+        statement = statement.where(model.id > decode_cursor(cursor))
+    models = session.exec(statement).all()
+
+    # A page shorter than the limit is the last page.
+    next_cursor = encode_cursor(models[-1].id) if len(models) == limit else None
+    return models, next_cursor
+
+
+def iter_all(
+    session: Session, model: SQLModel, yield_per: int = 1000
+) -> Iterator[SQLModel]:
+    statement = select(model).order_by(model.id).execution_options(yield_per=yield_per)
+    for db_model in session.exec(statement):
+        yield db_model
+
 
 class GenericCrud(
     Generic[ModelType, CreateSchemaType, UpdateSchemaType, ReturnSchemaType]
 ):
-    def __init__(self, model: ModelType):
+    def __init__(
+        self, model: ModelType, cache_maxsize: int = 1024, cache_ttl: float = 300.0
+    ):
         self.model = model
         self.name = model.__tablename__
+        self.natural_key = self._get_natural_key()
+        # Read-through cache for the select_cached_* methods, every write through this crud
+        # clears it.
+        self.cache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
+
+    def _get_natural_key(self) -> Tuple[str, ...]:
+        # The first unique constraint on the table identifies a record outside of its ID.
+        for constraint in self.model.__table__.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                return tuple(column.name for column in constraint.columns)
+        return ()
+
+    def _commit(
+        self, session: Session, changed: bool = True, commit: bool = True
+    ) -> None:
+        if changed:
+            bump_catalog_version(session)
+        # Without a commit the caller owns the transaction, the writes are only flushed.
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+        self.cache.clear()
 
     def insert_into_table(
         self, session: Session, model: CreateSchemaType
@@ -24,11 +126,184 @@ class GenericCrud(
         logger.info(f"Creating new {self.name} record")
         db_model = self.model.model_validate(model)
         session.add(db_model)
-        session.commit()
+        self._commit(session)
         session.refresh(db_model)
         logger.info(f"Created new {self.name} record with ID: {db_model.id}")
         return db_model
 
+    def insert_many(
+        self,
+        session: Session,
+        models: Sequence[CreateSchemaType],
+        chunk_size: int = 1000,
+    ) -> List[int]:
+        logger.info(f"Creating {len(models)} new {self.name} records")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got: {chunk_size}")
+
+        # Validate the whole batch before touching the database so a bad row never
+        # leaves a partially written batch behind.
+        rows = [
+            self.model.model_validate(model).model_dump(exclude={"id"})
+            for model in models
+        ]
+
+        # All chunks are written in the same transaction and committed once, every chunk
+        # is sent as a single executemany style statement.
+        if self.natural_key:
+            # SQLite can not batch inserts that return rows in parameter order, so the
+            # natural key is returned and used to put the IDs back in order.
+            key_columns = [getattr(self.model, field) for field in self.natural_key]
+            statement = insert(self.model).returning(self.model.id, *key_columns)
+            ids_per_key = {}
+            for start in range(0, len(rows), chunk_size):
+                for row in session.execute(statement, rows[start : start + chunk_size]):
+                    ids_per_key[tuple(row[1:])] = row[0]
+            ids = [
+                ids_per_key[tuple(row[field] for field in self.natural_key)]
+                for row in rows
+            ]
+        else:
+            statement = insert(self.model).returning(
+                self.model.id, sort_by_parameter_order=True
+            )
+            ids = []
+            for start in range(0, len(rows), chunk_size):
+                ids.extend(session.scalars(statement, rows[start : start + chunk_size]))
+        self._commit(session, changed=bool(rows))
+        logger.info(f"Created {len(ids)} new {self.name} records")
+        return ids
+
+    def sync_table(
+        self,
+        session: Session,
+        models: Sequence[CreateSchemaType],
+        deactivate_missing: bool = False,
+        chunk_size: int = 1000,
+    ) -> dict:
+        # Create schemas are validated when they are constructed.
+        return self.sync_rows(
+            session,
+            [model.model_dump() for model in models],
+            deactivate_missing=deactivate_missing,
+            chunk_size=chunk_size,
+        )
+
+    def _get_row_defaults(self) -> dict:
+        return {
+            field: field_info.get_default(call_default_factory=True)
+            for field, field_info in self.model.model_fields.items()
+            if field != "id" and not field_info.is_required()
+        }
+
+    def sync_rows(
+        self,
+        session: Session,
+        rows: Sequence[dict],
+        deactivate_missing: bool = False,
+        chunk_size: int = 1000,
+        commit: bool = True,
+    ) -> dict:
+        # Rows must already be valid, they are written without building a model per row.
+        logger.info(f"Synchronizing {len(rows)} {self.name} records")
+        if not self.natural_key:
+            raise ValueError(f"{self.name} has no unique constraint to synchronize on")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got: {chunk_size}")
+
+        fields = [
+            field for row in rows[:1] for field in row if field not in self.natural_key
+        ]
+        # The upsert updates the same fields for every row, a row with other fields would
+        # have these silently dropped.
+        invalid_rows = [
+            index for index, row in enumerate(rows) if row.keys() != rows[0].keys()
+        ]
+        if invalid_rows:
+            raise ValueError(
+                f"422: all {self.name} rows must have the same fields as the first row, rows with other fields: {invalid_rows}."
+            )
+        # A key can only be upserted once per statement, Postgres rejects updating the same
+        # row twice.
+        key_counts = Counter(
+            tuple(row[field] for field in self.natural_key) for row in rows
+        )
+        duplicate_keys = [key for key, count in key_counts.items() if count > 1]
+        if duplicate_keys:
+            raise ValueError(
+                f"422: duplicate {self.name} rows for {list(self.natural_key)}: {duplicate_keys}."
+            )
+        row_defaults = self._get_row_defaults()
+        key_columns = [getattr(self.model, field) for field in self.natural_key]
+        value_columns = [getattr(self.model, field) for field in fields]
+
+        # Fetch only the columns needed for the diff, not full ORM objects.
+        existing = {
+            tuple(row[: len(key_columns)]): row[len(key_columns) :]
+            for row in session.execute(
+                select(
+                    *key_columns,
+                    self.model.id,
+                    self.model.is_active,
+                    *value_columns,
+                )
+            )
+        }
+
+        rows_to_upsert = []
+        inserted = 0
+        seen_keys = set()
+        for row in rows:
+            row = {**row_defaults, **row}
+            key = tuple(row[field] for field in self.natural_key)
+            seen_keys.add(key)
+
+            current = existing.get(key)
+            if current is None:
+                inserted += 1
+            elif current[1] and tuple(current[2:]) == tuple(
+                row[field] for field in fields
+            ):
+                continue
+            rows_to_upsert.append(row)
+
+        if rows_to_upsert:
+            statement = get_upsert_insert(session, self.model)
+            update_data = {field: statement.excluded[field] for field in fields}
+            update_data.update(is_active=True, datetime_updated=datetime.now())
+            statement = statement.on_conflict_do_update(
+                index_elements=list(self.natural_key), set_=update_data
+            )
+            for start in range(0, len(rows_to_upsert), chunk_size):
+                session.execute(statement, rows_to_upsert[start : start + chunk_size])
+
+        ids_to_deactivate = []
+        if deactivate_missing:
+            ids_to_deactivate = [
+                current[0]
+                for key, current in existing.items()
+                if current[1] and key not in seen_keys
+            ]
+            for start in range(0, len(ids_to_deactivate), chunk_size):
+                session.execute(
+                    update(self.model)
+                    .where(
+                        self.model.id.in_(ids_to_deactivate[start : start + chunk_size])
+                    )
+                    .values(is_active=False, datetime_updated=datetime.now())
+                )
+
+        self._commit(
+            session, changed=bool(rows_to_upsert or ids_to_deactivate), commit=commit
+        )
+        result = {
+            "inserted": inserted,
+            "updated": len(rows_to_upsert) - inserted,
+            "deactivated": len(ids_to_deactivate),
+        }
+        logger.info(f"Synchronized {self.name} records: {result}")
+        return result
+
     def select_all(
         self, session: Session, offset: int = 0, limit: int = 100
     ) -> List[ReturnSchemaType]:
@@ -41,6 +316,20 @@ class GenericCrud(
             raise ValueError(f"404: no {self.name} found.")
         return models
 
+    def select_page(
+        self, session: Session, cursor: str | None = None, limit: int = 100
+    ) -> Tuple[List[ReturnSchemaType], str | None]:
+        logger.info(
+            f"Getting a page of {self.name} records with cursor: {cursor} and limit: {limit}"
+        )
+        return select_page(session, self.model, cursor=cursor, limit=limit)
+
+    def iter_all(
+        self, session: Session, yield_per: int = 1000
+    ) -> Iterator[ReturnSchemaType]:
+        logger.info(f"Streaming all {self.name} records with yield_per: {yield_per}")
+        return iter_all(session, self.model, yield_per=yield_per)
+
     def select_on_pk(self, session: Session, model_id: int) -> ReturnSchemaType:
         db_model = session.get(self.model, model_id)
         if not db_model:
@@ -48,6 +337,47 @@ class GenericCrud(
             raise ValueError(f"404: {self.name[:-1]} with ID: {model_id} not found.")
         return db_model
 
+    def _to_cached(self, db_model: ModelType) -> ReturnSchemaType:
+        # Cached records are detached Return schemas, never session bound ORM objects.
+        return self.model.Return.model_validate(db_model)
+
+    def select_cached_on_pk(self, session: Session, model_id: int) -> ReturnSchemaType:
+        cached = self.cache.get(("pk", model_id))
+        if cached is None:
+            cached = self._to_cached(self.select_on_pk(session, model_id))
+            self.cache.set(("pk", model_id), cached)
+        return cached.model_copy()
+
+    def select_cached_on_natural_key(self, session: Session, **key) -> ReturnSchemaType:
+        if set(key) != set(self.natural_key):
+            raise ValueError(
+                f"{self.name} is identified by: {self.natural_key}, got: {tuple(key)}"
+            )
+        cache_key = ("natural_key",) + tuple(key[field] for field in self.natural_key)
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            db_model = session.exec(
+                select(self.model).where(
+                    *(
+                        getattr(self.model, field) == key[field]
+                        for field in self.natural_key
+                    )
+                )
+            ).first()
+            if not db_model:
+                key_description = ", ".join(
+                    f"{field}: {value}" for field, value in key.items()
+                )
+                logger.warning(
+                    f"{self.name[:-1]} record with {key_description} not found"
+                )
+                raise ValueError(
+                    f"404: {self.name[:-1]} with {key_description} not found."
+                )
+            cached = self._to_cached(db_model)
+            self.cache.set(cache_key, cached)
+        return cached.model_copy()
+
     def update_table_on_pk(
         self, session: Session, model: UpdateSchemaType
     ) -> ReturnSchemaType:
@@ -56,7 +386,7 @@ class GenericCrud(
         model_data = model.model_dump(exclude_unset=True)
         db_model.sqlmodel_update(model_data)
         session.add(db_model)
-        session.commit()
+        self._commit(session)
         session.refresh(db_model)
         logger.info(f"Updated {self.name[:-1]} record with ID: {model.id}")
         return db_model
@@ -76,6 +406,6 @@ class GenericCrud(
             db_model.is_active = False
             session.add(db_model)
 
-        session.commit()
+        self._commit(session)
         logger.info(f"Deleted {self.name[:-1]} record with ID: {model_id}")
         return {"ok": True}
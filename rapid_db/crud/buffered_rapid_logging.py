@@ -0,0 +1,158 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+from collections import defaultdict
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List
+from ..async_database import create_async_session_maker, get_async_engine
+from ..models.rapid_logging import StageLogMessage
+from .async_rapid_logging import AsyncStageLogMessageCrud, async_stage_log_message_crud
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class BufferedStageLogMessageWriter:
+    def __init__(
+        self,
+        crud: AsyncStageLogMessageCrud = async_stage_log_message_crud,
+        session_maker: async_sessionmaker[AsyncSession] | None = None,
+        max_batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+    ):
+        self.crud = crud
+        self.session_maker = session_maker
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pid: int | None = None
+
+    @property
+    def is_running(self) -> bool:
+        # A forked worker process inherits the task of its parent, but not the loop that
+        # runs it.
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._pid == os.getpid()
+        )
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        if self.session_maker is None:
+            self.session_maker = create_async_session_maker(get_async_engine())
+        # The queue is bounded, when the database can not keep up adding a message waits
+        # for room instead of growing the buffer without limit.
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._loop = asyncio.get_running_loop()
+        self._pid = os.getpid()
+        self._task = asyncio.create_task(self._run())
+
+    async def add(self, stage_log_message: StageLogMessage.Add) -> None:
+        if not self.is_running:
+            raise RuntimeError("BufferedStageLogMessageWriter is not started")
+        await self._queue.put(stage_log_message)
+
+    async def flush(self) -> None:
+        # A marker is queued behind all messages added so far, it is resolved once these
+        # messages are written.
+        if not self.is_running:
+            return
+        flushed = asyncio.get_running_loop().create_future()
+        await self._queue.put(flushed)
+        await flushed
+
+    def flush_threadsafe(self, timeout: float | None = 30.0) -> None:
+        # For synchronous code in other threads, the flush runs on the loop of the writer.
+        # On that loop itself it can not be waited for, async callers await flush instead.
+        if not self.is_running:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.flush(), self._loop).result(timeout)
+        except concurrent.futures.TimeoutError:
+            logger.warning(
+                f"Timed out after {timeout} seconds flushing buffered stage_log_messages"
+            )
+
+    async def close(self) -> None:
+        if not self.is_running:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[StageLogMessage.Add] = []
+            flushed: List[asyncio.Future] = []
+            item = await self._queue.get()
+            deadline = loop.time() + self.flush_interval
+
+            # Collect until the batch is full, a flush is requested or the interval passed.
+            while True:
+                if isinstance(item, asyncio.Future):
+                    flushed.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            await self._write(batch)
+            for future in flushed:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _write(self, batch: List[StageLogMessage.Add]) -> None:
+        if not batch:
+            return
+        try:
+            async with self.session_maker() as session:
+                await self.crud.add_many(session, batch)
+            return
+        except Exception as exception:
+            logger.warning(
+                f"Failed to write {len(batch)} buffered stage_log_messages, retrying per stage_log with error message: {exception}"
+            )
+
+        # A single closed or missing stage_log should not drop the messages of the others.
+        messages_per_stage_log_id = defaultdict(list)
+        for stage_log_message in batch:
+            messages_per_stage_log_id[stage_log_message.stage_log_id].append(
+                stage_log_message
+            )
+        for stage_log_id, stage_log_messages in messages_per_stage_log_id.items():
+            try:
+                async with self.session_maker() as session:
+                    await self.crud.add_many(session, stage_log_messages)
+            except Exception as exception:
+                logger.error(
+                    f"Dropped {len(stage_log_messages)} stage_log_messages for stage_log with ID: {stage_log_id} with error message: {exception}"
+                )
+
+
+buffered_stage_log_message_writer = BufferedStageLogMessageWriter()
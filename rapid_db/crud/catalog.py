@@ -1,5 +1,19 @@
 from .base import GenericCrud
-from ..models.catalog import Source, Stage, Table, Column, DataTypeMapping
+from ..models.catalog import (
+    Source,
+    Stage,
+    Table,
+    Column,
+    DataTypeMapping,
+    TableSchema,
+)
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
 
 
 class SourceCrud(GenericCrud[Source, Source.Create, Source.Update, Source.Return]):
@@ -22,6 +36,35 @@ class TableCrud(GenericCrud[Table, Table.Create, Table.Update, Table.Return]):
     def __init__(self):
         super().__init__(model=Table)
 
+    def select_table_schema(self, session: Session, table_id: int) -> TableSchema:
+        # The table with its source, stage, columns and their data_type_mappings in a
+        # single joined query.
+        db_table = (
+            session.exec(
+                select(Table)
+                .where(Table.id == table_id)
+                .options(
+                    joinedload(Table.table_source),
+                    joinedload(Table.table_stage),
+                    joinedload(Table.table_columns).joinedload(
+                        Column.column_data_type_mapping
+                    ),
+                )
+            )
+            .unique()
+            .first()
+        )
+        if not db_table:
+            logger.warning(f"{self.name[:-1]} record with ID: {table_id} not found")
+            raise ValueError(f"404: {self.name[:-1]} with ID: {table_id} not found.")
+
+        table_schema = TableSchema.model_validate(db_table, update={"version": ""})
+        table_schema.table_columns.sort(key=lambda column: column.id)
+        table_schema.version = hashlib.sha256(
+            table_schema.model_dump_json(exclude={"version"}).encode()
+        ).hexdigest()
+        return table_schema
+
 
 table_crud = TableCrud()
 
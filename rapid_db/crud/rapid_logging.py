@@ -1,7 +1,10 @@
 import logging
-from sqlmodel import Session
-from ..models.rapid_logging import StageLog, StageLogMessage
+from sqlmodel import Session, select, insert, delete, func
+from sqlalchemy import and_, case, or_
+from ..models.rapid_logging import StageLog, StageLogMessage, StageLogSummary
+from .base import get_upsert_insert, select_page, iter_all
 from datetime import datetime
+from typing import Iterator, List, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -33,6 +36,16 @@ class StageLogCrud:
             )
         return db_stage_log
 
+    def get_stage_logs_page(
+        self, session: Session, cursor: str | None = None, limit: int = 100
+    ) -> Tuple[List[StageLog.Return], str | None]:
+        return select_page(session, StageLog, cursor=cursor, limit=limit)
+
+    def iter_stage_logs(
+        self, session: Session, yield_per: int = 1000
+    ) -> Iterator[StageLog.Return]:
+        return iter_all(session, StageLog, yield_per=yield_per)
+
     def close_stage_log(
         self, session: Session, stage_log: StageLog.Close
     ) -> StageLog.Return:
@@ -45,11 +58,161 @@ class StageLogCrud:
         db_stage_log.sqlmodel_update(stage_log_data, update=close_data)
 
         session.add(db_stage_log)
+        session.flush()
+        self._upsert_summary(session, db_stage_log)
         session.commit()
         session.refresh(db_stage_log)
         logger.info(f"Closed stage_log with ID: {stage_log.id}")
         return db_stage_log
 
+    def _summary_row(self, db_stage_log: StageLog) -> dict:
+        duration_seconds = None
+        if db_stage_log.datetime_ended is not None:
+            duration_seconds = (
+                db_stage_log.datetime_ended - db_stage_log.datetime_started
+            ).total_seconds()
+        return {
+            "table_id": db_stage_log.table_id,
+            "stage_id": db_stage_log.stage_id,
+            "last_stage_log_id": db_stage_log.id,
+            "last_cdc_key": db_stage_log.cdc_key,
+            "last_success": db_stage_log.success,
+            "last_datetime_started": db_stage_log.datetime_started,
+            "last_datetime_ended": db_stage_log.datetime_ended,
+            "last_duration_seconds": duration_seconds,
+            "last_number_of_records_processed": db_stage_log.number_of_records_processed,
+            "last_successful_stage_log_id": (
+                db_stage_log.id if db_stage_log.success else None
+            ),
+            "last_successful_cdc_key": (
+                db_stage_log.cdc_key if db_stage_log.success else None
+            ),
+            "last_successful_datetime_ended": (
+                db_stage_log.datetime_ended if db_stage_log.success else None
+            ),
+        }
+
+    def _upsert_summary(self, session: Session, db_stage_log: StageLog) -> None:
+        # A single upsert in the transaction of the close, so concurrent closes of the same
+        # table and stage never lose an update. The last successful run only moves forward.
+        row = self._summary_row(db_stage_log)
+        statement = get_upsert_insert(session, StageLogSummary).values(row)
+        is_newer_success = and_(
+            statement.excluded.last_successful_cdc_key.is_not(None),
+            or_(
+                StageLogSummary.last_successful_cdc_key.is_(None),
+                statement.excluded.last_successful_cdc_key
+                >= StageLogSummary.last_successful_cdc_key,
+            ),
+        )
+        set_ = {}
+        for name in row:
+            if name in ("table_id", "stage_id"):
+                continue
+            if name.startswith("last_successful_"):
+                set_[name] = case(
+                    (is_newer_success, statement.excluded[name]),
+                    else_=StageLogSummary.__table__.c[name],
+                )
+            else:
+                set_[name] = statement.excluded[name]
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StageLogSummary.table_id, StageLogSummary.stage_id],
+                set_=set_,
+            )
+        )
+
+    def get_stage_log_summaries(
+        self,
+        session: Session,
+        stage_id: int | None = None,
+        table_ids: Sequence[int] | None = None,
+    ) -> List[StageLogSummary.Return]:
+        statement = select(StageLogSummary).order_by(
+            StageLogSummary.table_id, StageLogSummary.stage_id
+        )
+        if stage_id is not None:
+            statement = statement.where(StageLogSummary.stage_id == stage_id)
+        if table_ids is not None:
+            statement = statement.where(StageLogSummary.table_id.in_(table_ids))
+        return session.exec(statement).all()
+
+    def rebuild_stage_log_summaries(self, session: Session) -> int:
+        # Rebuilds the summaries from all closed stage_logs, for stage_logs written before
+        # the summaries existed.
+        last_ids = (
+            select(func.max(StageLog.id))
+            .where(~StageLog.is_open)
+            .group_by(StageLog.table_id, StageLog.stage_id)
+        )
+        rows = {
+            (db_stage_log.table_id, db_stage_log.stage_id): self._summary_row(
+                db_stage_log
+            )
+            for db_stage_log in session.exec(
+                select(StageLog).where(StageLog.id.in_(last_ids))
+            )
+        }
+
+        last_successful_cdc_keys = (
+            select(
+                StageLog.table_id,
+                StageLog.stage_id,
+                func.max(StageLog.cdc_key).label("cdc_key"),
+            )
+            .where(StageLog.success, ~StageLog.is_open)
+            .group_by(StageLog.table_id, StageLog.stage_id)
+            .subquery()
+        )
+        last_successful_ids = (
+            select(func.max(StageLog.id))
+            .join(
+                last_successful_cdc_keys,
+                and_(
+                    StageLog.table_id == last_successful_cdc_keys.c.table_id,
+                    StageLog.stage_id == last_successful_cdc_keys.c.stage_id,
+                    StageLog.cdc_key == last_successful_cdc_keys.c.cdc_key,
+                    StageLog.success,
+                    ~StageLog.is_open,
+                ),
+            )
+            .group_by(StageLog.table_id, StageLog.stage_id)
+        )
+        for db_stage_log in session.exec(
+            select(StageLog).where(StageLog.id.in_(last_successful_ids))
+        ):
+            row = rows[(db_stage_log.table_id, db_stage_log.stage_id)]
+            row["last_successful_stage_log_id"] = db_stage_log.id
+            row["last_successful_cdc_key"] = db_stage_log.cdc_key
+            row["last_successful_datetime_ended"] = db_stage_log.datetime_ended
+
+        session.execute(delete(StageLogSummary))
+        if rows:
+            session.execute(insert(StageLogSummary), list(rows.values()))
+        session.commit()
+        logger.info(f"Rebuilt {len(rows)} stage_log_summaries")
+        return len(rows)
+
+    def delete_stage_logs(
+        self, session: Session, stage_log_ids: Sequence[int], chunk_size: int = 1000
+    ) -> int:
+        # The messages and logs are removed with one statement per chunk each, the
+        # summaries are kept.
+        stage_log_ids = list(stage_log_ids)
+        number_of_stage_logs = 0
+        for start in range(0, len(stage_log_ids), chunk_size):
+            chunk = stage_log_ids[start : start + chunk_size]
+            session.execute(
+                delete(StageLogMessage).where(StageLogMessage.stage_log_id.in_(chunk))
+            )
+            number_of_stage_logs += session.execute(
+                delete(StageLog).where(StageLog.id.in_(chunk))
+            ).rowcount
+        session.commit()
+        logger.info(f"Deleted {number_of_stage_logs} stage_logs")
+        return number_of_stage_logs
+
     def delete_stage_log(self, session: Session, stage_log_id: int) -> dict:
         db_stage_log = self.get_stage_log_on_id(
             session=session, stage_log_id=stage_log_id
@@ -99,6 +262,49 @@ class StageLogMessageCrud:
                 f"403: Forbidden to add stage_log_messages to closed stage_log with ID: {stage_log_message.stage_log_id}."
             )
 
+    def add_many(
+        self,
+        session: Session,
+        stage_log_messages: Sequence[StageLogMessage.Add],
+        chunk_size: int = 1000,
+    ) -> dict:
+        logger.info(f"Adding {len(stage_log_messages)} new stage_log_messages")
+        rows = [
+            StageLogMessage.model_validate(stage_log_message).model_dump(exclude={"id"})
+            for stage_log_message in stage_log_messages
+        ]
+
+        # Check once per distinct stage_log if it exists and is still open.
+        stage_log_ids = {row["stage_log_id"] for row in rows}
+        open_per_stage_log_id = dict(
+            session.exec(
+                select(StageLog.id, StageLog.is_open).where(
+                    StageLog.id.in_(stage_log_ids)
+                )
+            ).all()
+        )
+        missing_ids = sorted(stage_log_ids - open_per_stage_log_id.keys())
+        if missing_ids:
+            logger.warning(f"No stage_logs found with IDs: {missing_ids}")
+            raise ValueError(f"404: stage_logs with IDs: {missing_ids} not found.")
+        closed_ids = sorted(
+            stage_log_id
+            for stage_log_id, is_open in open_per_stage_log_id.items()
+            if not is_open
+        )
+        if closed_ids:
+            logger.warning(f"stage_logs with IDs: {closed_ids} are closed")
+            raise ValueError(
+                f"403: Forbidden to add stage_log_messages to closed stage_logs with IDs: {closed_ids}."
+            )
+
+        # All messages are inserted in one transaction with executemany statements.
+        for start in range(0, len(rows), chunk_size):
+            session.execute(insert(StageLogMessage), rows[start : start + chunk_size])
+        session.commit()
+        logger.info(f"Added {len(rows)} new stage_log_messages")
+        return {"ok": True, "number_of_stage_log_messages": len(rows)}
+
     def get_stage_log_message_on_id(
         self, session: Session, stage_log_message_id: int
     ) -> StageLogMessage.Return:
@@ -0,0 +1,289 @@
+import logging
+from sqlmodel import Session, select, update, func
+from sqlalchemy import and_, or_
+from ..models.work_queue import WorkItem, WorkItemStatus
+from .base import get_upsert_insert
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Sequence
+import threading
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class WorkItemCrud:
+    def __init__(
+        self,
+        lease_seconds: float = 1800.0,
+        backoff_seconds: float = 30.0,
+        max_backoff_seconds: float = 3600.0,
+    ):
+        self.name = WorkItem.__tablename__
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+    def enqueue_many(
+        self,
+        session: Session,
+        work_items: Sequence[WorkItem.Enqueue],
+        chunk_size: int = 1000,
+    ) -> int:
+        # Items already queued for a table, stage and cdc_key are left as they are, so
+        # enqueueing a load again never reprocesses the tables that completed.
+        rows = [work_item.model_dump() for work_item in work_items]
+        number_of_work_items = 0
+        for start in range(0, len(rows), chunk_size):
+            statement = (
+                get_upsert_insert(session, WorkItem)
+                .values(rows[start : start + chunk_size])
+                .on_conflict_do_nothing(
+                    index_elements=[
+                        WorkItem.table_id,
+                        WorkItem.stage_id,
+                        WorkItem.cdc_key,
+                    ]
+                )
+            )
+            number_of_work_items += session.execute(statement).rowcount
+        session.commit()
+        logger.info(f"Enqueued {number_of_work_items} new {self.name}")
+        return number_of_work_items
+
+    def get_work_item_on_id(
+        self, session: Session, work_item_id: int
+    ) -> WorkItem.Return:
+        db_work_item = session.get(WorkItem, work_item_id)
+        if not db_work_item:
+            logger.warning(f"No {self.name[:-1]} found with ID: {work_item_id}")
+            raise ValueError(
+                f"404: {self.name[:-1]} with ID: {work_item_id} not found."
+            )
+        return db_work_item
+
+    def fail_exhausted(self, session: Session) -> int:
+        # Items whose lease expired on their last attempt are not retried anymore.
+        now = datetime.now()
+        result = session.execute(
+            update(WorkItem)
+            .where(
+                WorkItem.status == WorkItemStatus.running,
+                WorkItem.lease_expires_at < now,
+                WorkItem.attempts >= WorkItem.max_attempts,
+            )
+            .values(
+                status=WorkItemStatus.failed,
+                last_error="Lease expired on the last attempt",
+                datetime_updated=now,
+            )
+        )
+        session.commit()
+        return result.rowcount
+
+    def claim(
+        self,
+        session: Session,
+        worker_id: str,
+        stage_id: int | None = None,
+        cdc_key: int | None = None,
+        lease_seconds: float | None = None,
+    ) -> WorkItem.Return | None:
+        now = datetime.now()
+        is_claimable = and_(
+            WorkItem.attempts < WorkItem.max_attempts,
+            or_(
+                and_(
+                    WorkItem.status == WorkItemStatus.pending,
+                    WorkItem.available_at <= now,
+                ),
+                and_(
+                    WorkItem.status == WorkItemStatus.running,
+                    WorkItem.lease_expires_at < now,
+                ),
+            ),
+        )
+        candidate = select(WorkItem.id).where(is_claimable)
+        if stage_id is not None:
+            candidate = candidate.where(WorkItem.stage_id == stage_id)
+        if cdc_key is not None:
+            candidate = candidate.where(WorkItem.cdc_key == cdc_key)
+        candidate = (
+            candidate.order_by(WorkItem.available_at, WorkItem.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+
+        # A single update claims the item, the claim condition is checked again on the row
+        # so two workers never both get the same item.
+        lease_seconds = self.lease_seconds if lease_seconds is None else lease_seconds
+        db_work_item = (
+            session.execute(
+                update(WorkItem)
+                .where(WorkItem.id == candidate, is_claimable)
+                .values(
+                    status=WorkItemStatus.running,
+                    attempts=WorkItem.attempts + 1,
+                    worker_id=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    datetime_updated=now,
+                )
+                .returning(WorkItem)
+            )
+            .scalars()
+            .first()
+        )
+        session.commit()
+        if db_work_item is None:
+            return None
+        logger.info(
+            f"Worker: {worker_id} claimed {self.name[:-1]} with ID: {db_work_item.id}"
+        )
+        return WorkItem.Return.model_validate(db_work_item)
+
+    def extend_lease(
+        self,
+        session: Session,
+        work_item_id: int,
+        worker_id: str,
+        lease_seconds: float | None = None,
+    ) -> WorkItem.Return:
+        db_work_item = self._get_leased_work_item(session, work_item_id, worker_id)
+        lease_seconds = self.lease_seconds if lease_seconds is None else lease_seconds
+        db_work_item.lease_expires_at = datetime.now() + timedelta(
+            seconds=lease_seconds
+        )
+        session.add(db_work_item)
+        session.commit()
+        session.refresh(db_work_item)
+        return db_work_item
+
+    def complete(
+        self, session: Session, work_item: WorkItem.Complete
+    ) -> WorkItem.Return:
+        db_work_item = self._get_leased_work_item(
+            session, work_item.id, work_item.worker_id
+        )
+        now = datetime.now()
+        db_work_item.stage_log_id = work_item.stage_log_id
+        db_work_item.number_of_records_processed = work_item.number_of_records_processed
+        db_work_item.last_error = (
+            work_item.error[:1024] if work_item.error is not None else None
+        )
+        db_work_item.lease_expires_at = None
+        db_work_item.datetime_updated = now
+
+        if work_item.success:
+            db_work_item.status = WorkItemStatus.succeeded
+        elif db_work_item.attempts < db_work_item.max_attempts:
+            # Retries back off exponentially, the first one after backoff_seconds.
+            backoff_seconds = min(
+                self.backoff_seconds * 2 ** (db_work_item.attempts - 1),
+                self.max_backoff_seconds,
+            )
+            db_work_item.status = WorkItemStatus.pending
+            db_work_item.available_at = now + timedelta(seconds=backoff_seconds)
+        else:
+            db_work_item.status = WorkItemStatus.failed
+
+        session.add(db_work_item)
+        session.commit()
+        session.refresh(db_work_item)
+        logger.info(
+            f"Completed {self.name[:-1]} with ID: {db_work_item.id} with status: {WorkItemStatus(db_work_item.status).value}"
+        )
+        return db_work_item
+
+    def count_by_status(
+        self,
+        session: Session,
+        stage_id: int | None = None,
+        cdc_key: int | None = None,
+    ) -> Dict[str, int]:
+        statement = select(WorkItem.status, func.count(WorkItem.id)).group_by(
+            WorkItem.status
+        )
+        if stage_id is not None:
+            statement = statement.where(WorkItem.stage_id == stage_id)
+        if cdc_key is not None:
+            statement = statement.where(WorkItem.cdc_key == cdc_key)
+        counts = {status.value: 0 for status in WorkItemStatus}
+        for status, count in session.exec(statement):
+            counts[WorkItemStatus(status).value] = count
+        return counts
+
+    def _get_leased_work_item(
+        self, session: Session, work_item_id: int, worker_id: str
+    ) -> WorkItem:
+        db_work_item = self.get_work_item_on_id(session, work_item_id)
+        if (
+            db_work_item.status != WorkItemStatus.running
+            or db_work_item.worker_id != worker_id
+        ):
+            logger.warning(
+                f"Worker: {worker_id} does not hold the lease on {self.name[:-1]} with ID: {work_item_id}"
+            )
+            raise ValueError(
+                f"409: {self.name[:-1]} with ID: {work_item_id} is not leased by worker: {worker_id}."
+            )
+        return db_work_item
+
+
+class LeaseHeartbeat:
+    # Renews the lease of a work_item from a background thread while it is processed, so
+    # a table that takes longer than the lease is not claimed by another worker. The
+    # thread uses its own sessions, sessions are not safe to share between threads.
+    def __init__(
+        self,
+        crud: WorkItemCrud,
+        session_factory: Callable[[], Session],
+        work_item_id: int,
+        worker_id: str,
+        lease_seconds: float | None = None,
+        interval: float | None = None,
+    ):
+        self.crud = crud
+        self.session_factory = session_factory
+        self.work_item_id = work_item_id
+        self.worker_id = worker_id
+        self.lease_seconds = (
+            crud.lease_seconds if lease_seconds is None else lease_seconds
+        )
+        self.interval = self.lease_seconds / 3 if interval is None else interval
+        self.is_lost = False
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.session_factory() as session:
+                    self.crud.extend_lease(
+                        session,
+                        self.work_item_id,
+                        self.worker_id,
+                        lease_seconds=self.lease_seconds,
+                    )
+            except ValueError as exception:
+                # The item is not leased by this worker anymore, renewing is pointless.
+                logger.warning(
+                    f"Lost the lease on {self.crud.name[:-1]} with ID: {self.work_item_id} with error message: {exception}"
+                )
+                self.is_lost = True
+                return
+            except Exception as exception:
+                logger.error(
+                    f"Failed to renew the lease on {self.crud.name[:-1]} with ID: {self.work_item_id} with error message: {exception}"
+                )
+
+
+work_item_crud = WorkItemCrud()
@@ -1,17 +1,94 @@
 from sqlmodel import create_engine, Session, SQLModel
-from sqlalchemy import event
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from . import partitioning  # noqa: F401, compiles the partitioned tables on Postgres
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
 
 sqlite_file_name = "rapid_db.db"
 
 sqlite_url = f"sqlite:///{sqlite_file_name}"
-engine = create_engine(sqlite_url, echo=True)
 
 
-def _fk_pragma_on_connect(dbapi_con, con_record):
-    dbapi_con.execute("pragma foreign_keys=ON")
+class DatabaseSettings(SQLModel, table=False):
+    url: str = sqlite_url
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+
+    # SQLite only
+    busy_timeout: int = 5000
+    mmap_size: int = 268435456
+    cache_size: int = -64000
+
+    @classmethod
+    def from_env(cls, prefix: str = "RAPID_DB_") -> "DatabaseSettings":
+        settings = {
+            field: os.environ[f"{prefix}{field.upper()}"]
+            for field in cls.model_fields
+            if f"{prefix}{field.upper()}" in os.environ
+        }
+        return cls.model_validate(settings)
+
+
+def _sqlite_pragmas(settings: DatabaseSettings) -> list[str]:
+    pragmas = [
+        "pragma foreign_keys=ON",
+        f"pragma busy_timeout={settings.busy_timeout}",
+        f"pragma cache_size={settings.cache_size}",
+    ]
+    # WAL and memory mapping only make sense for a database that lives in a file.
+    if make_url(settings.url).database not in (None, "", ":memory:"):
+        pragmas += [
+            "pragma journal_mode=WAL",
+            "pragma synchronous=NORMAL",
+            f"pragma mmap_size={settings.mmap_size}",
+        ]
+    return pragmas
+
+
+def add_sqlite_pragmas(rapid_engine: Engine, settings: DatabaseSettings) -> None:
+    pragmas = _sqlite_pragmas(settings)
+
+    def _pragmas_on_connect(dbapi_con, con_record):
+        # A cursor is used so this works for both the sqlite3 and aiosqlite adapters.
+        cursor = dbapi_con.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(rapid_engine, "connect", _pragmas_on_connect)
 
 
-event.listen(engine, "connect", _fk_pragma_on_connect)
+def create_rapid_engine(settings: DatabaseSettings | None = None) -> Engine:
+    settings = settings or DatabaseSettings.from_env()
+    url = make_url(settings.url)
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite keeps the default pool SQLAlchemy picks for file or memory databases.
+        rapid_engine = create_engine(
+            url, echo=settings.echo, pool_pre_ping=settings.pool_pre_ping
+        )
+        add_sqlite_pragmas(rapid_engine, settings)
+    else:
+        rapid_engine = create_engine(
+            url,
+            echo=settings.echo,
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_pre_ping=settings.pool_pre_ping,
+            pool_recycle=settings.pool_recycle,
+        )
+
+    return rapid_engine
+
+
+engine = create_rapid_engine()
 
 
 def get_session():
@@ -19,5 +96,33 @@ def get_session():
         yield session
 
 
+# Columns added to tables after their release, create_all only creates missing tables.
+ADDED_COLUMNS = [
+    ("columns", "is_watermark", "BOOLEAN NOT NULL DEFAULT false"),
+]
+
+
+def migrate_database(rapid_engine: Engine) -> None:
+    # Additive only and safe to run on every start, columns and indexes are only created
+    # when they are missing.
+    with rapid_engine.begin() as connection:
+        inspector = inspect(connection)
+        for table_name, column_name, column_type in ADDED_COLUMNS:
+            if not inspector.has_table(table_name):
+                continue
+            if column_name in {
+                column["name"] for column in inspector.get_columns(table_name)
+            }:
+                continue
+            logger.warning(f"Adding column {column_name} to {table_name}")
+            connection.execute(
+                text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+            )
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
 def build_database():
     SQLModel.metadata.create_all(engine)
+    migrate_database(engine)
@@ -0,0 +1,305 @@
+import polars as pl
+from .models.catalog import (
+    Source,
+    Stage,
+    DataTypeMapping,
+    Table,
+    Column,
+)
+from .crud.catalog import (
+    source_crud,
+    stage_crud,
+    data_type_mapping_crud,
+    table_crud,
+    column_crud,
+)
+
+from sqlmodel import SQLModel, Session, select
+from typing import Dict, List, NamedTuple, Sequence
+from annotated_types import MaxLen
+import sqlalchemy as sa
+
+POLARS_TYPES = {str: pl.Utf8, int: pl.Int64, bool: pl.Boolean, float: pl.Float64}
+
+
+class NaturalKeyReference(NamedTuple):
+    id_column: str
+    catalog: str
+    # Column in the sheet mapped to the column in the index of the catalog.
+    key_columns: Dict[str, str]
+
+
+NATURAL_KEY_REFERENCES = {
+    "data_type_mappings": [
+        NaturalKeyReference("source_id", "sources", {"source_name": "name"}),
+    ],
+    "tables": [
+        NaturalKeyReference("source_id", "sources", {"source_name": "name"}),
+        NaturalKeyReference("stage_id", "stages", {"stage_name": "name"}),
+    ],
+    "columns": [
+        NaturalKeyReference(
+            "table_id",
+            "tables",
+            {
+                "table_name": "name",
+                "source_name": "source_name",
+                "stage_name": "stage_name",
+            },
+        ),
+        NaturalKeyReference(
+            "data_type_mapping_id",
+            "data_type_mappings",
+            {"source_data_type": "source_data_type", "source_name": "source_name"},
+        ),
+    ],
+}
+
+CATALOG_INDEX_QUERIES = {
+    "sources": sa.select(Source.id, Source.name).where(Source.is_active),
+    "stages": sa.select(Stage.id, Stage.name).where(Stage.is_active),
+    "tables": sa.select(
+        Table.id,
+        Table.name,
+        Source.name.label("source_name"),
+        Stage.name.label("stage_name"),
+    )
+    .join(Source, Table.source_id == Source.id)
+    .join(Stage, Table.stage_id == Stage.id)
+    .where(Table.is_active),
+    "data_type_mappings": sa.select(
+        DataTypeMapping.id,
+        DataTypeMapping.source_data_type,
+        Source.name.label("source_name"),
+    )
+    .join(Source, DataTypeMapping.source_id == Source.id)
+    .where(DataTypeMapping.is_active),
+}
+
+
+class CatalogIndex:
+    # The natural keys of a catalog are loaded with one query the first time a sheet
+    # references it, and reloaded only after that catalog is synced.
+    def __init__(self, session: Session):
+        self.session = session
+        self._frames: Dict[str, pl.DataFrame] = {}
+
+    def get(self, catalog: str) -> pl.DataFrame:
+        if catalog not in self._frames:
+            statement = CATALOG_INDEX_QUERIES[catalog]
+            self._frames[catalog] = pl.DataFrame(
+                [tuple(row) for row in self.session.execute(statement)],
+                schema={
+                    column.name: pl.Int64 if column.name == "id" else pl.Utf8
+                    for column in statement.selected_columns
+                },
+                orient="row",
+            )
+        return self._frames[catalog]
+
+    def invalidate(self, catalog: str) -> None:
+        self._frames.pop(catalog, None)
+
+
+def _describe_lines(df_invalid: pl.DataFrame) -> List[int]:
+    # Line numbers as seen in the sheet, the header is the first line.
+    return [row_index + 2 for row_index in df_invalid.get_column("row_index")]
+
+
+def resolve_natural_keys(
+    df: pl.DataFrame, references: Sequence[NaturalKeyReference], index: CatalogIndex
+) -> tuple[pl.DataFrame, List[str]]:
+    # Sheets may name the records they reference instead of giving their ids, the names
+    # are translated for the whole sheet with one join per reference.
+    errors = []
+    df = df.with_row_index("row_index")
+    key_columns_in_sheet = set()
+    for reference in references:
+        if not all(column in df.columns for column in reference.key_columns):
+            continue
+        key_columns_in_sheet.update(reference.key_columns)
+
+        df_index = (
+            index.get(reference.catalog)
+            .rename({value: key for key, value in reference.key_columns.items()})
+            .group_by(list(reference.key_columns))
+            .agg(
+                pl.col("id").first().alias("resolved_id"),
+                pl.len().alias("matches"),
+            )
+        )
+        df = df.with_columns(
+            pl.col(column).cast(pl.Utf8) for column in reference.key_columns
+        ).join(df_index, on=list(reference.key_columns), how="left")
+
+        has_keys = pl.all_horizontal(
+            pl.col(column).is_not_null() for column in reference.key_columns
+        )
+        if reference.id_column in df.columns:
+            has_keys = has_keys & pl.col(reference.id_column).is_null()
+        key_names = ", ".join(reference.key_columns)
+        df_invalid = df.filter(has_keys & pl.col("resolved_id").is_null())
+        if len(df_invalid):
+            errors.append(
+                f"key {key_names} references a missing record in {reference.catalog} on lines: {_describe_lines(df_invalid)}"
+            )
+        df_invalid = df.filter(has_keys & (pl.col("matches") > 1))
+        if len(df_invalid):
+            errors.append(
+                f"key {key_names} matches more than one record in {reference.catalog} on lines: {_describe_lines(df_invalid)}"
+            )
+
+        # Ids given in the sheet take precedence over the names.
+        resolved_id = pl.when(pl.col("matches") == 1).then(pl.col("resolved_id"))
+        if reference.id_column in df.columns:
+            resolved_id = (
+                pl.when(pl.col(reference.id_column).is_not_null())
+                .then(pl.col(reference.id_column).cast(pl.Utf8))
+                .otherwise(resolved_id.cast(pl.Utf8))
+            )
+        df = df.with_columns(resolved_id.alias(reference.id_column)).drop(
+            "resolved_id", "matches"
+        )
+
+    df = df.sort("row_index").drop("row_index", *key_columns_in_sheet)
+    return df, errors
+
+
+def validate_metadata(
+    session: Session, df: pl.DataFrame, object_type: SQLModel
+) -> tuple[pl.DataFrame, List[str]]:
+    # All checks run on whole columns of the frame, so every error of a sheet is reported
+    # at once and no model is built per row.
+    errors = []
+    df = df.with_row_index("row_index")
+    columns = []
+    for name, field in object_type.Create.model_fields.items():
+        table_column = object_type.__table__.columns[name]
+        if name not in df.columns:
+            if field.is_required():
+                errors.append(f"column {name} is missing")
+            continue
+        columns.append(name)
+
+        # Types, values that can not be cast become null and are reported.
+        python_type = next(
+            (
+                python_type
+                for python_type in POLARS_TYPES
+                if python_type
+                in (field.annotation, *getattr(field.annotation, "__args__", ()))
+            ),
+            None,
+        )
+        if python_type is not None:
+            df = df.with_columns(
+                pl.col(name)
+                .cast(POLARS_TYPES[python_type], strict=False)
+                .alias(f"{name}_cast")
+            )
+            df_invalid = df.filter(
+                pl.col(name).is_not_null() & pl.col(f"{name}_cast").is_null()
+            )
+            if len(df_invalid):
+                errors.append(
+                    f"column {name} is not of type {python_type.__name__} on lines: {_describe_lines(df_invalid)}"
+                )
+            df = df.with_columns(pl.col(f"{name}_cast").alias(name)).drop(
+                f"{name}_cast"
+            )
+
+        # Nullability, empty cells of fields with a default get that default.
+        if not table_column.nullable:
+            if not field.is_required():
+                df = df.with_columns(pl.col(name).fill_null(field.default))
+            df_invalid = df.filter(pl.col(name).is_null())
+            if len(df_invalid):
+                errors.append(
+                    f"column {name} can not be empty on lines: {_describe_lines(df_invalid)}"
+                )
+
+        # Lengths, the limit of the schema or else the one of the database column.
+        max_length = next(
+            (
+                metadata.max_length
+                for metadata in field.metadata
+                if isinstance(metadata, MaxLen)
+            ),
+            (
+                getattr(table_column.type, "length", None)
+                if isinstance(table_column.type, sa.String)
+                else None
+            ),
+        )
+        if max_length is not None:
+            df_invalid = df.filter(
+                pl.col(name).cast(pl.Utf8).str.len_chars() > max_length
+            )
+            if len(df_invalid):
+                errors.append(
+                    f"column {name} is longer than {max_length} characters on lines: {_describe_lines(df_invalid)}"
+                )
+
+        # Referential integrity, one query per foreign key for the ids that exist.
+        for foreign_key in table_column.foreign_keys:
+            existing_ids = session.exec(select(foreign_key.column)).all()
+            df_invalid = df.filter(
+                pl.col(name).is_not_null()
+                & ~pl.col(name).is_in(pl.Series(existing_ids, dtype=pl.Int64))
+            )
+            if len(df_invalid):
+                errors.append(
+                    f"column {name} references a missing record in {foreign_key.column.table.name} on lines: {_describe_lines(df_invalid)}"
+                )
+
+    return df.select(columns), errors
+
+
+# The order is important, sheets reference the records synced from the sheets before.
+METADATA_SHEETS = {
+    "sources": (Source, source_crud),
+    "stages": (Stage, stage_crud),
+    "data_type_mappings": (DataTypeMapping, data_type_mapping_crud),
+    "tables": (Table, table_crud),
+    "columns": (Column, column_crud),
+}
+
+
+def sync_metadata(session: Session, metadata: Dict[str, pl.DataFrame]) -> dict:
+    # All sheets are synced in one transaction, an invalid sheet leaves the catalog as it
+    # was before.
+    index = CatalogIndex(session)
+    sync_results = {}
+    try:
+        for table, (object_class, crud_method) in METADATA_SHEETS.items():
+            df, errors = resolve_natural_keys(
+                metadata[table],
+                references=NATURAL_KEY_REFERENCES.get(table, []),
+                index=index,
+            )
+            df_valid, validation_errors = validate_metadata(
+                session, df=df, object_type=object_class
+            )
+            errors.extend(validation_errors)
+            if errors:
+                raise ValueError(
+                    f"422: invalid metadata in sheet: {table} with errors: {'; '.join(errors)}."
+                )
+
+            # Enriched tables are created by the orchestration and are not listed in the
+            # sheet, so tables missing from the sheet are not deactivated.
+            sync_results[table] = crud_method.sync_rows(
+                session,
+                df_valid.to_dicts(),
+                deactivate_missing=table != "tables",
+                commit=False,
+            )
+            index.invalidate(table)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        for _, crud_method in METADATA_SHEETS.values():
+            crud_method.cache.clear()
+    return sync_results
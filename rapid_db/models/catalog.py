@@ -134,11 +134,21 @@ class ColumnBase(SQLModel, table=False):
     precision: int | None
     scale: int | None
     primary_key: bool = Field(default=False)
+    # Marks the column that tells which records changed since the last ingestion.
+    is_watermark: bool = Field(default=False)
 
 
 class Column(ColumnBase, CatalogBase, table=True):
     __table_args__ = (
         UniqueConstraint("name", "table_id", name="unique_column_name_table_id"),
+        # A table has at most one active watermark column.
+        sa.Index(
+            "unique_column_watermark_table_id",
+            "table_id",
+            unique=True,
+            sqlite_where=sa.text("is_watermark AND is_active"),
+            postgresql_where=sa.text("is_watermark AND is_active"),
+        ),
     )
     table_id: int = Field(foreign_key="tables.id", index=True)
     column_table: "Table" = Relationship(back_populates="table_columns")
@@ -174,6 +184,7 @@ class Column(ColumnBase, CatalogBase, table=True):
         precision: int | None
         scale: int | None
         primary_key: bool | None = Field(default=None)
+        is_watermark: bool | None = Field(default=None)
         data_type_mapping_id: int | None
 
 
@@ -228,3 +239,22 @@ class DataTypeMapping(DataTypeMappingBase, CatalogBase, table=True):
             max_length=64, sa_type=sa.String(length=64), default=None
         )
         source_id: int | None
+
+
+class CatalogVersion(SQLModel, table=True):
+    # A single row counter, bumped by every write through the catalog cruds.
+    __tablename__ = "catalog_versions"
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+
+
+class ColumnSchema(Column.Return, table=False):
+    column_data_type_mapping: DataTypeMapping.Return
+
+
+class TableSchema(Table.Return, table=False):
+    table_source: Source.Return
+    table_stage: Stage.Return
+    table_columns: List[ColumnSchema]
+    # Hash of the schema content, used as ETag so callers can revalidate a cached schema.
+    version: str
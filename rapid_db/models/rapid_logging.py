@@ -17,6 +17,16 @@ class LoggingBase(SQLModel, table=False):
 
 class StageLog(LoggingBase, table=True):
     __tablename__ = "stage_logs"
+    # Covers the lookup of the latest successful cdc_key per table and stage.
+    __table_args__ = (
+        sa.Index(
+            "ix_stage_logs_table_id_stage_id_success_cdc_key",
+            "table_id",
+            "stage_id",
+            "success",
+            "cdc_key",
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True, index=True)
 
@@ -76,6 +86,12 @@ class StageLog(LoggingBase, table=True):
 
 class StageLogMessage(LoggingBase, table=True):
     __tablename__ = "stage_log_messages"
+    # On Postgres the messages are range partitioned per month, see partitioning.py.
+    # Other databases ignore this and create a plain table.
+    __table_args__ = {
+        "postgresql_partition_by": "RANGE (datetime_stage_log_message)",
+        "info": {"partition_key": "datetime_stage_log_message"},
+    }
 
     id: int | None = Field(default=None, primary_key=True, index=True)
 
@@ -99,3 +115,38 @@ class StageLogMessage(LoggingBase, table=True):
         message: str = Field(max_length=1024)
         is_error: bool
         datetime_stage_log_message: datetime
+
+
+class StageLogSummary(LoggingBase, table=True):
+    __tablename__ = "stage_log_summaries"
+
+    # One row per table and stage, kept up to date when a stage_log is closed.
+    table_id: int = Field(foreign_key="tables.id", primary_key=True)
+    stage_id: int = Field(foreign_key="stages.id", primary_key=True)
+
+    # No foreign keys to stage_logs, old stage_logs can be removed while the summary stays.
+    last_stage_log_id: int
+    last_cdc_key: int
+    last_success: bool | None = Field(default=None)
+    last_datetime_started: datetime
+    last_datetime_ended: datetime | None = Field(default=None)
+    last_duration_seconds: float | None = Field(default=None)
+    last_number_of_records_processed: int | None = Field(default=None)
+
+    last_successful_stage_log_id: int | None = Field(default=None)
+    last_successful_cdc_key: int | None = Field(default=None)
+    last_successful_datetime_ended: datetime | None = Field(default=None)
+
+    class Return(LoggingBase, table=False):
+        table_id: int
+        stage_id: int
+        last_stage_log_id: int
+        last_cdc_key: int
+        last_success: bool | None
+        last_datetime_started: datetime
+        last_datetime_ended: datetime | None
+        last_duration_seconds: float | None
+        last_number_of_records_processed: int | None
+        last_successful_stage_log_id: int | None
+        last_successful_cdc_key: int | None
+        last_successful_datetime_ended: datetime | None
@@ -0,0 +1,86 @@
+from sqlmodel import Field, SQLModel, UniqueConstraint
+from datetime import datetime
+from enum import Enum
+import sqlalchemy as sa
+
+
+class WorkItemStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class WorkItem(SQLModel, table=True):
+    __tablename__ = "work_items"
+    __table_args__ = (
+        UniqueConstraint(
+            "table_id",
+            "stage_id",
+            "cdc_key",
+            name="unique_work_item_table_id_stage_id_cdc_key",
+        ),
+        # Workers look for claimable items on status and the moment they are available.
+        sa.Index("ix_work_items_status_available_at", "status", "available_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True, index=True)
+    table_id: int = Field(foreign_key="tables.id", index=True)
+    stage_id: int = Field(foreign_key="stages.id", index=True)
+    cdc_key: int = Field(index=True)
+    run_id: str | None = Field(
+        default=None, max_length=256, sa_type=sa.String(length=256)
+    )
+
+    status: WorkItemStatus = Field(
+        default=WorkItemStatus.pending, sa_type=sa.String(length=16)
+    )
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    # Pending items are not claimed before available_at, this is how retries back off.
+    available_at: datetime = Field(default_factory=datetime.now)
+    # A running item whose lease expired is claimed again, its worker is presumed dead.
+    lease_expires_at: datetime | None = Field(default=None)
+    worker_id: str | None = Field(
+        default=None, max_length=256, sa_type=sa.String(length=256)
+    )
+
+    # No foreign key, stage_logs are archived and removed while work_items stay.
+    stage_log_id: int | None = Field(default=None)
+    number_of_records_processed: int | None = Field(default=None)
+    last_error: str | None = Field(
+        default=None, max_length=1024, sa_type=sa.String(length=1024)
+    )
+    datetime_created: datetime = Field(default_factory=datetime.now)
+    datetime_updated: datetime = Field(default_factory=datetime.now)
+
+    class Enqueue(SQLModel, table=False):
+        table_id: int
+        stage_id: int
+        cdc_key: int
+        run_id: str | None = Field(max_length=256, default=None)
+        max_attempts: int = Field(default=3, ge=1)
+
+    class Complete(SQLModel, table=False):
+        id: int
+        worker_id: str
+        success: bool
+        stage_log_id: int | None = None
+        number_of_records_processed: int | None = None
+        error: str | None = None
+
+    class Return(SQLModel, table=False):
+        id: int
+        table_id: int
+        stage_id: int
+        cdc_key: int
+        run_id: str | None
+        status: WorkItemStatus
+        attempts: int
+        max_attempts: int
+        available_at: datetime
+        lease_expires_at: datetime | None
+        worker_id: str | None
+        stage_log_id: int | None
+        number_of_records_processed: int | None
+        last_error: str | None
@@ -0,0 +1,335 @@
+from sqlalchemy import MetaData, PrimaryKeyConstraint, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateTable
+from datetime import date, datetime, timedelta
+from sqlmodel import SQLModel
+from typing import List, NamedTuple
+import asyncio
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+PARTITION_KEY = "partition_key"
+PARTITION_NAME = re.compile(r"^(?P<table_name>.+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+@compiles(CreateTable, "postgresql")
+def _create_partitioned_table(create: CreateTable, compiler, **kw) -> str:
+    # Postgres requires the partition key in the primary key of a partitioned table, the
+    # models keep id as primary key so SQLite keeps its autoincrement. The table is
+    # compiled from a copy with the composite primary key.
+    table = create.element
+    partition_key = table.info.get(PARTITION_KEY)
+    if partition_key is None:
+        return compiler.visit_create_table(create, **kw)
+
+    metadata = MetaData()
+    for foreign_key in table.foreign_keys:
+        foreign_key.column.table.to_metadata(metadata)
+    table.to_metadata(metadata)
+    partitioned_table = metadata.tables[table.key]
+    # With a composite primary key id is only generated when marked explicitly.
+    partitioned_table.c.id.autoincrement = True
+    partitioned_table.c[partition_key].primary_key = True
+    partitioned_table.append_constraint(
+        PrimaryKeyConstraint(partitioned_table.c.id, partitioned_table.c[partition_key])
+    )
+    return compiler.visit_create_table(CreateTable(partitioned_table), **kw)
+
+
+class Partition(NamedTuple):
+    name: str
+    start: date
+    end: date
+
+
+def add_months(month: date, months: int) -> date:
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def is_partitioned(connection: Connection, table_name: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table_name"
+            ),
+            {"table_name": table_name},
+        ).first()
+    )
+
+
+def check_partitioned(connection: Connection, table_name: str) -> bool:
+    # A table created before it was partitioned stays a plain table, create_all does not
+    # change existing tables. Maintenance fails for it instead of silently doing nothing.
+    if connection.dialect.name != "postgresql":
+        return False
+    if is_partitioned(connection, table_name):
+        return True
+    logger.warning(f"{table_name} is meant to be partitioned but is a plain table")
+    raise ValueError(
+        f"409: {table_name} is not partitioned, run migrate_to_partitioned first."
+    )
+
+
+def get_partition_key(table_name: str) -> str:
+    return SQLModel.metadata.tables[table_name].info[PARTITION_KEY]
+
+
+def _has_table(connection: Connection, name: str) -> bool:
+    return bool(
+        connection.execute(
+            text("SELECT 1 FROM pg_class WHERE relname = :name"), {"name": name}
+        ).first()
+    )
+
+
+def _create_partition(
+    connection: Connection, table_name: str, partition: Partition, has_default: bool
+) -> None:
+    create_partition = text(
+        f'CREATE TABLE "{partition.name}" PARTITION OF "{table_name}" '
+        f"FOR VALUES FROM ('{partition.start}') TO ('{partition.end}')"
+    )
+    default_name = f"{table_name}_default"
+    partition_key = get_partition_key(table_name)
+    in_range = f"{partition_key} >= '{partition.start}' AND {partition_key} < '{partition.end}'"
+    if (
+        not has_default
+        or not connection.execute(
+            text(f'SELECT 1 FROM "{default_name}" WHERE {in_range} LIMIT 1')
+        ).first()
+    ):
+        connection.execute(create_partition)
+        return
+
+    # Postgres refuses a partition for rows the default partition already holds, so the
+    # default is detached while its rows of the month move to the new partition.
+    logger.warning(
+        f"Moving rows of {partition.name} out of the default partition of {table_name}"
+    )
+    connection.execute(
+        text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{default_name}"')
+    )
+    connection.execute(create_partition)
+    connection.execute(
+        text(
+            f'INSERT INTO "{partition.name}" SELECT * FROM "{default_name}" WHERE {in_range}'
+        )
+    )
+    connection.execute(text(f'DELETE FROM "{default_name}" WHERE {in_range}'))
+    connection.execute(
+        text(f'ALTER TABLE "{table_name}" ATTACH PARTITION "{default_name}" DEFAULT')
+    )
+
+
+def create_partitions(
+    connection: Connection,
+    table_name: str,
+    months_ahead: int = 3,
+    start: date | None = None,
+    commit: bool = True,
+) -> List[Partition]:
+    # Monthly partitions from the current month up to months_ahead, and a default partition
+    # so an insert outside of them never fails. Other databases are left as they are.
+    if not check_partitioned(connection, table_name):
+        return []
+
+    existing = {partition.name for partition in list_partitions(connection, table_name)}
+    has_default = _has_table(connection, f"{table_name}_default")
+    month = (start or datetime.now().date()).replace(day=1)
+    created = []
+    for months in range(months_ahead + 1):
+        partition_start = add_months(month, months)
+        partition = Partition(
+            name=f"{table_name}_p{partition_start:%Y_%m}",
+            start=partition_start,
+            end=add_months(partition_start, 1),
+        )
+        if partition.name in existing:
+            continue
+        _create_partition(connection, table_name, partition, has_default)
+        created.append(partition)
+    if not has_default:
+        connection.execute(
+            text(
+                f'CREATE TABLE "{table_name}_default" PARTITION OF "{table_name}" DEFAULT'
+            )
+        )
+    if commit:
+        connection.commit()
+    logger.info(f"Created {len(created)} partitions of {table_name}")
+    return created
+
+
+def list_partitions(connection: Connection, table_name: str) -> List[Partition]:
+    if not is_partitioned(connection, table_name):
+        return []
+    partitions = []
+    for (name,) in connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table_name"
+        ),
+        {"table_name": table_name},
+    ):
+        match = PARTITION_NAME.match(name)
+        if match is None or match["table_name"] != table_name:
+            continue
+        start = date(int(match["year"]), int(match["month"]), 1)
+        partitions.append(Partition(name=name, start=start, end=add_months(start, 1)))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def drop_partitions_before(
+    connection: Connection, table_name: str, before: date
+) -> List[Partition]:
+    # Partitions holding only rows from before the cutoff are dropped as a whole, which
+    # removes their rows without scanning or deleting them one by one.
+    if not check_partitioned(connection, table_name):
+        return []
+    dropped = [
+        partition
+        for partition in list_partitions(connection, table_name)
+        if partition.end <= before
+    ]
+    for partition in dropped:
+        connection.execute(text(f'DROP TABLE IF EXISTS "{partition.name}"'))
+    # Rows that landed in the default partition are purged row by row.
+    if _has_table(connection, f"{table_name}_default"):
+        connection.execute(
+            text(
+                f'DELETE FROM "{table_name}_default" '
+                f"WHERE {get_partition_key(table_name)} < '{before}'"
+            )
+        )
+    connection.commit()
+    if dropped:
+        logger.info(f"Dropped {len(dropped)} partitions of {table_name}")
+    return dropped
+
+
+def migrate_to_partitioned(
+    connection: Connection, table_name: str, months_ahead: int = 3
+) -> dict:
+    # A table created before it was partitioned is renamed, and its rows are copied into a
+    # new partitioned table in one transaction. The renamed table is kept so it can be
+    # checked before it is dropped by hand.
+    if (
+        connection.dialect.name != "postgresql"
+        or not _has_table(connection, table_name)
+        or is_partitioned(connection, table_name)
+    ):
+        return {"ok": True, "migrated": False}
+
+    unpartitioned_name = f"{table_name}_unpartitioned"
+    logger.warning(f"Migrating {table_name} to a partitioned table")
+    connection.execute(
+        text(f'ALTER TABLE "{table_name}" RENAME TO "{unpartitioned_name}"')
+    )
+    # Index names are unique per schema, the new table creates its own.
+    for (index_name,) in connection.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table_name"),
+        {"table_name": unpartitioned_name},
+    ).all():
+        connection.execute(
+            text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_unpartitioned"')
+        )
+    table = SQLModel.metadata.tables[table_name]
+    table.create(connection)
+
+    partition_key = get_partition_key(table_name)
+    first = connection.execute(
+        text(f'SELECT min({partition_key}) FROM "{unpartitioned_name}"')
+    ).scalar()
+    start = (first.date() if first is not None else datetime.now().date()).replace(
+        day=1
+    )
+    today = datetime.now().date()
+    create_partitions(
+        connection,
+        table_name,
+        months_ahead=(today.year - start.year) * 12
+        + today.month
+        - start.month
+        + months_ahead,
+        start=start,
+        commit=False,
+    )
+
+    columns = ", ".join(column.name for column in table.columns)
+    number_of_rows = connection.execute(
+        text(
+            f'INSERT INTO "{table_name}" ({columns}) '
+            f'SELECT {columns} FROM "{unpartitioned_name}"'
+        )
+    ).rowcount
+    # The new table has a sequence of its own, it continues after the copied IDs.
+    connection.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+            f'COALESCE((SELECT max(id) FROM "{table_name}"), 0) + 1, false)'
+        )
+    )
+    connection.commit()
+    logger.warning(
+        f"Migrated {number_of_rows} rows of {table_name} to a partitioned table, the old table is kept as {unpartitioned_name}"
+    )
+    return {
+        "ok": True,
+        "migrated": True,
+        "number_of_rows": number_of_rows,
+        "unpartitioned_table": unpartitioned_name,
+    }
+
+
+def maintain_partitions(
+    engine: Engine,
+    table_name: str = "stage_log_messages",
+    months_ahead: int = 3,
+    retention_days: int | None = None,
+) -> dict:
+    with engine.connect() as connection:
+        created = create_partitions(connection, table_name, months_ahead=months_ahead)
+        dropped = []
+        if retention_days is not None:
+            dropped = drop_partitions_before(
+                connection,
+                table_name,
+                before=(datetime.now() - timedelta(days=retention_days)).date(),
+            )
+    return {
+        "ok": True,
+        "created_partitions": [partition.name for partition in created],
+        "dropped_partitions": [partition.name for partition in dropped],
+    }
+
+
+async def run_partition_maintenance(
+    engine: Engine,
+    interval_seconds: float = 24 * 3600,
+    months_ahead: int = 3,
+    retention_days: int | None = None,
+) -> None:
+    # Runs next to the app instead of in its startup, a failing run is logged and retried
+    # on the next interval.
+    while True:
+        try:
+            await asyncio.to_thread(
+                maintain_partitions,
+                engine,
+                months_ahead=months_ahead,
+                retention_days=retention_days,
+            )
+        except Exception as exception:
+            logger.error(
+                f"Failed to maintain partitions with error message: {exception}"
+            )
+        await asyncio.sleep(interval_seconds)
@@ -1,5 +1,8 @@
+import pytest
+from sqlalchemy import event
 from sqlmodel import Session
 from ...models.catalog import Source, Table, Stage, Column, DataTypeMapping
+from ...crud.base import get_catalog_version
 from ...crud.catalog import (
     source_crud,
     table_crud,
@@ -227,3 +230,89 @@ def test_data_type_mapping_source_relation(session: Session):
     # Check that the relation is correctly set up in both directions
     assert data_type_mapping in source.source_data_type_mappings
     assert source is data_type_mapping.data_type_mapping_source
+
+
+def create_table_schema(session: Session):
+    source_crud.insert_into_table(
+        session, Source.Create(name="source", connection_details="details")
+    )
+    stage_crud.insert_into_table(session, Stage.Create(name="raw"))
+    table_crud.insert_into_table(
+        session,
+        Table.Create(name="table", source_location="location", stage_id=1, source_id=1),
+    )
+    data_type_mapping_crud.insert_into_table(
+        session,
+        DataTypeMapping.Create(
+            source_data_type="int", sql_type="int", parquet_type="int32", source_id=1
+        ),
+    )
+    for name in ["b", "a"]:
+        column_crud.insert_into_table(
+            session,
+            Column.Create(
+                name=name,
+                data_type="int",
+                length=None,
+                nullable=True,
+                precision=None,
+                scale=None,
+                table_id=1,
+                data_type_mapping_id=1,
+            ),
+        )
+
+
+def test_select_table_schema(session: Session):
+    create_table_schema(session)
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    session.expire_all()
+
+    table_schema = table_crud.select_table_schema(session, table_id=1)
+
+    assert len(statements) == 1
+    assert table_schema.name == "table"
+    assert table_schema.table_source.name == "source"
+    assert table_schema.table_stage.name == "raw"
+    assert [column.name for column in table_schema.table_columns] == ["b", "a"]
+    assert table_schema.table_columns[0].column_data_type_mapping.parquet_type == "int32"
+    assert len(table_schema.version) == 64
+
+
+def test_select_table_schema_version_changes(session: Session):
+    create_table_schema(session)
+    version = table_crud.select_table_schema(session, table_id=1).version
+    assert table_crud.select_table_schema(session, table_id=1).version == version
+
+    table_crud.update_table_on_pk(session, Table.Update(id=1, description="changed"))
+    assert table_crud.select_table_schema(session, table_id=1).version != version
+
+
+def test_select_table_schema_invalid(session: Session):
+    with pytest.raises(ValueError) as exception_info:
+        table_crud.select_table_schema(session, table_id=1)
+
+    assert str(exception_info.value) == "404: table with ID: 1 not found."
+
+
+def test_catalog_version(session: Session):
+    assert get_catalog_version(session) == 0
+
+    source = Source.Create(name="source", connection_details="details")
+    source_crud.insert_into_table(session, source)
+    assert get_catalog_version(session) == 1
+
+    source_crud.sync_table(session, [source])
+    assert get_catalog_version(session) == 1
+    stage_crud.insert_many(session, [])
+    assert get_catalog_version(session) == 1
+
+    stage_crud.insert_many(session, [Stage.Create(name="raw")])
+    source_crud.update_table_on_pk(session, Source.Update(id=1, description="1"))
+    source_crud.delete_from_table(session, model_id=1)
+    assert get_catalog_version(session) == 4
@@ -115,3 +115,86 @@ def test_name_connection_details_unique(session):
     source_crud.insert_into_table(session, valid_source)
     with pytest.raises(IntegrityError) as _:
         source_crud.insert_into_table(session, valid_source)
+
+
+def test_sync_sources(session: Session):
+    source_crud.insert_into_table(session, valid_source)
+    source_crud.insert_into_table(
+        session,
+        Source.Create(name="2", description="2", connection_details="2"),
+    )
+
+    result = source_crud.sync_table(
+        session,
+        [
+            Source.Create(name="1", description="changed", connection_details="1"),
+            Source.Create(name="3", description="3", connection_details="3"),
+        ],
+        deactivate_missing=True,
+    )
+    assert result == {"inserted": 1, "updated": 1, "deactivated": 1}
+
+    db_sources = source_crud.select_all(session)
+    assert [db_source.id for db_source in db_sources] == [1, 2, 3]
+    assert db_sources[0].description == "changed"
+    assert db_sources[0].is_active
+    assert not db_sources[1].is_active
+    assert db_sources[2].name == "3"
+
+
+def test_sync_sources_unchanged(session: Session):
+    source_crud.insert_into_table(session, valid_source)
+
+    result = source_crud.sync_table(session, [valid_source])
+    assert result == {"inserted": 0, "updated": 0, "deactivated": 0}
+
+
+def test_sync_sources_reactivates(session: Session):
+    source_crud.insert_into_table(session, valid_source)
+    source_crud.delete_from_table(session, model_id=1)
+
+    result = source_crud.sync_table(session, [valid_source])
+    assert result == {"inserted": 0, "updated": 1, "deactivated": 0}
+    assert source_crud.select_on_pk(session, model_id=1).is_active
+
+
+def test_sync_source_rows(session: Session):
+    result = source_crud.sync_rows(
+        session, [{"name": "1", "description": None, "connection_details": "1"}]
+    )
+    assert result == {"inserted": 1, "updated": 0, "deactivated": 0}
+
+    db_source = source_crud.select_on_pk(session, model_id=1)
+    assert db_source.is_active
+    assert db_source.datetime_created is not None
+
+
+def test_sync_source_rows_duplicate_keys(session: Session):
+    rows = [
+        {"name": "1", "description": "1", "connection_details": "1"},
+        {"name": "1", "description": "2", "connection_details": "1"},
+    ]
+    with pytest.raises(ValueError, match=r"422: duplicate sources rows .*\('1', '1'\)"):
+        source_crud.sync_rows(session, rows)
+    assert list(source_crud.iter_all(session)) == []
+
+
+def test_sync_source_rows_different_fields(session: Session):
+    rows = [
+        {"name": "1", "connection_details": "1"},
+        {"name": "2", "description": "2", "connection_details": "2"},
+    ]
+    with pytest.raises(ValueError, match=r"422: .* rows with other fields: \[1\]"):
+        source_crud.sync_rows(session, rows)
+
+
+def test_sync_source_rows_without_commit(session: Session):
+    source_crud.sync_rows(
+        session,
+        [{"name": "1", "description": "1", "connection_details": "1"}],
+        commit=False,
+    )
+    assert len(source_crud.select_all(session)) == 1
+
+    session.rollback()
+    assert list(source_crud.iter_all(session)) == []
@@ -4,6 +4,7 @@ from ...crud.catalog import stage_crud
 from ...models.catalog import Stage
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import event
 
 
 valid_stage = Stage.Create(name="1", description="1")
@@ -110,3 +111,47 @@ def test_stage_unique(session):
     stage_crud.insert_into_table(session, valid_stage)
     with pytest.raises(IntegrityError) as _:
         stage_crud.insert_into_table(session, valid_stage)
+
+
+def test_select_cached_stage_on_natural_key(session: Session):
+    stage_crud.insert_into_table(session, valid_stage)
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    db_stage = stage_crud.select_cached_on_natural_key(session, name="1")
+    assert db_stage.id == 1
+    assert db_stage.name == "1"
+    number_of_statements = len(statements)
+
+    # The second lookup is served from the cache.
+    assert stage_crud.select_cached_on_natural_key(session, name="1").id == 1
+    assert stage_crud.select_cached_on_pk(session, 1).id == 1
+    assert stage_crud.select_cached_on_pk(session, 1).id == 1
+    assert len(statements) == number_of_statements + 1
+
+
+def test_select_cached_stage_invalidated_on_update(session: Session):
+    stage_crud.insert_into_table(session, valid_stage)
+    assert stage_crud.select_cached_on_pk(session, 1).description == "1"
+
+    stage_crud.update_table_on_pk(session, Stage.Update(id=1, description="2"))
+    assert stage_crud.select_cached_on_pk(session, 1).description == "2"
+
+    stage_crud.delete_from_table(session, model_id=1, hard_delete=True)
+    with pytest.raises(ValueError) as exception_info:
+        stage_crud.select_cached_on_pk(session, 1)
+    assert str(exception_info.value) == "404: stage with ID: 1 not found."
+
+
+def test_select_cached_stage_on_natural_key_invalid(session: Session):
+    with pytest.raises(ValueError) as exception_info:
+        stage_crud.select_cached_on_natural_key(session, name="raw")
+    assert str(exception_info.value) == "404: stage with name: raw not found."
+
+    with pytest.raises(ValueError) as exception_info:
+        stage_crud.select_cached_on_natural_key(session, id=1)
+    assert str(exception_info.value) == "stages is identified by: ('name',), got: ('id',)"
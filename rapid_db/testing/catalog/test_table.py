@@ -4,6 +4,7 @@ from ...crud.catalog import table_crud
 from ...models.catalog import Table
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import event
 
 
 valid_table = Table.Create(
@@ -122,3 +123,114 @@ def test_table_name_source_id_stage_id_unique(session):
 
     with pytest.raises(IntegrityError) as _:
         table_crud.insert_into_table(session, valid_table)
+
+
+def test_insert_many_tables(session: Session):
+    tables = [
+        Table.Create(
+            name=str(index), source_location=str(index), stage_id=1, source_id=1
+        )
+        for index in range(5)
+    ]
+
+    ids = table_crud.insert_many(session, tables, chunk_size=2)
+    assert ids == [1, 2, 3, 4, 5]
+
+    db_tables = table_crud.select_all(session)
+    assert [db_table.name for db_table in db_tables] == ["0", "1", "2", "3", "4"]
+    assert all(db_table.is_active for db_table in db_tables)
+    assert all(db_table.datetime_created is not None for db_table in db_tables)
+
+
+def test_insert_many_tables_empty(session: Session):
+    assert table_crud.insert_many(session, []) == []
+
+
+def test_insert_many_tables_invalid_chunk_size(session: Session):
+    with pytest.raises(ValueError) as exception_info:
+        table_crud.insert_many(session, [valid_table], chunk_size=0)
+
+    assert str(exception_info.value) == "chunk_size must be positive, got: 0"
+
+
+def test_insert_many_tables_unique(session: Session):
+    with pytest.raises(IntegrityError) as _:
+        table_crud.insert_many(session, [valid_table, valid_table])
+
+
+def test_select_page_tables(session: Session):
+    tables = [
+        Table.Create(
+            name=str(index), source_location=str(index), stage_id=1, source_id=1
+        )
+        for index in range(5)
+    ]
+    table_crud.insert_many(session, tables)
+
+    first_page, cursor = table_crud.select_page(session, limit=2)
+    assert [db_table.id for db_table in first_page] == [1, 2]
+
+    second_page, cursor = table_crud.select_page(session, cursor=cursor, limit=2)
+    assert [db_table.id for db_table in second_page] == [3, 4]
+
+    last_page, cursor = table_crud.select_page(session, cursor=cursor, limit=2)
+    assert [db_table.id for db_table in last_page] == [5]
+    assert cursor is None
+
+
+def test_select_page_tables_empty(session: Session):
+    page, cursor = table_crud.select_page(session)
+
+    assert page == []
+    assert cursor is None
+
+
+def test_select_page_tables_invalid_cursor(session: Session):
+    with pytest.raises(ValueError) as exception_info:
+        table_crud.select_page(session, cursor="invalid")
+
+    assert str(exception_info.value) == "400: invalid cursor: invalid."
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1001])
+def test_select_page_tables_invalid_limit(session: Session, limit: int):
+    with pytest.raises(ValueError) as exception_info:
+        table_crud.select_page(session, limit=limit)
+
+    assert (
+        str(exception_info.value)
+        == f"400: limit must be between 1 and 1000, got: {limit}."
+    )
+
+
+def test_iter_all_tables(session: Session):
+    tables = [
+        Table.Create(
+            name=str(index), source_location=str(index), stage_id=1, source_id=1
+        )
+        for index in range(5)
+    ]
+    table_crud.insert_many(session, tables)
+
+    db_tables = list(table_crud.iter_all(session, yield_per=2))
+    assert [db_table.id for db_table in db_tables] == [1, 2, 3, 4, 5]
+
+
+def test_insert_many_tables_one_statement_per_chunk(session: Session):
+    tables = [
+        Table.Create(
+            name=str(index), source_location=str(index), stage_id=1, source_id=1
+        )
+        for index in range(5)
+    ]
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    ids = table_crud.insert_many(session, tables, chunk_size=3)
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert len([s for s in statements if s.startswith("INSERT INTO tables")]) == 2
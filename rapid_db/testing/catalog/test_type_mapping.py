@@ -0,0 +1,77 @@
+import pytest
+from sqlmodel import Session
+from ...crud.catalog import data_type_mapping_crud
+from ...models.catalog import Column, DataTypeMapping
+from ...type_mapping import DataTypeResolver, get_data_type_resolver
+
+data_type_mappings = [
+    DataTypeMapping.Create(
+        source_data_type="varchar",
+        sql_type="nvarchar",
+        parquet_type="string",
+        source_id=1,
+    ),
+    DataTypeMapping.Create(
+        source_data_type="int", sql_type="int", parquet_type="int32", source_id=1
+    ),
+    DataTypeMapping.Create(
+        source_data_type="int", sql_type="bigint", parquet_type="int64", source_id=2
+    ),
+]
+
+
+def test_resolve(session: Session):
+    data_type_mapping_crud.insert_many(session, data_type_mappings)
+    resolver = DataTypeResolver.from_session(session)
+
+    assert resolver.resolve(1, "int").parquet_type == "int32"
+    assert resolver.resolve(2, "int").sql_type == "bigint"
+    assert [
+        data_type_mapping.parquet_type
+        for data_type_mapping in resolver.resolve_many(1, ["varchar", "int"])
+    ] == ["string", "int32"]
+
+
+def test_resolve_invalid(session: Session):
+    data_type_mapping_crud.insert_many(session, data_type_mappings)
+    resolver = DataTypeResolver.from_session(session)
+
+    with pytest.raises(ValueError) as exception_info:
+        resolver.resolve(2, "varchar")
+    assert (
+        str(exception_info.value)
+        == "404: data_type_mapping with source_data_type: varchar and source_id: 2 not found."
+    )
+
+
+def test_resolve_ignores_inactive(session: Session):
+    data_type_mapping_crud.insert_many(session, data_type_mappings)
+    data_type_mapping_crud.delete_from_table(session, model_id=1)
+    resolver = DataTypeResolver.from_session(session)
+
+    assert "varchar" not in resolver.get_source_mappings(1)
+
+
+def test_resolve_columns(session: Session):
+    data_type_mapping_crud.insert_many(session, data_type_mappings)
+    resolver = DataTypeResolver.from_session(session)
+    columns = [
+        Column(name="b", data_type="int", table_id=1, data_type_mapping_id=2),
+        Column(name="a", data_type="varchar", table_id=1, data_type_mapping_id=1),
+    ]
+
+    schema = resolver.resolve_columns(columns)
+    assert list(schema) == ["b", "a"]
+    assert schema["b"].parquet_type == "int32"
+    assert schema["a"].parquet_type == "string"
+
+
+def test_get_data_type_resolver_rebuilt_after_write(session: Session):
+    data_type_mapping_crud.insert_many(session, data_type_mappings[:1])
+    resolver = get_data_type_resolver(session)
+    assert get_data_type_resolver(session) is resolver
+
+    data_type_mapping_crud.insert_many(session, data_type_mappings[1:])
+    new_resolver = get_data_type_resolver(session)
+    assert new_resolver is not resolver
+    assert new_resolver.resolve(2, "int").parquet_type == "int64"
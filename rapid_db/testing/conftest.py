@@ -1,5 +1,12 @@
 import pytest
 from sqlmodel import create_engine, SQLModel, Session
+from ..crud.catalog import (
+    source_crud,
+    stage_crud,
+    table_crud,
+    column_crud,
+    data_type_mapping_crud,
+)
 
 
 @pytest.fixture(name="session")
@@ -8,3 +15,18 @@ def session_fixture():
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
         yield session
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_caches():
+    # The crud instances are shared between tests, their caches must not leak records of
+    # one test database into the next.
+    for crud in [
+        source_crud,
+        stage_crud,
+        table_crud,
+        column_crud,
+        data_type_mapping_crud,
+    ]:
+        crud.cache.clear()
+    yield
@@ -0,0 +1,171 @@
+import asyncio
+import multiprocessing
+from sqlmodel import SQLModel, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from ...async_database import create_async_session_maker
+from ...crud.async_rapid_logging import async_stage_log_crud
+from ...crud.buffered_rapid_logging import BufferedStageLogMessageWriter
+from ...models.rapid_logging import StageLog, StageLogMessage
+
+
+def run_with_session_maker(test):
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        await test(create_async_session_maker(engine))
+        await engine.dispose()
+
+    asyncio.run(_run())
+
+
+async def get_messages(session_maker):
+    async with session_maker() as session:
+        return (await session.exec(select(StageLogMessage))).all()
+
+
+def test_buffered_writer_flushes_on_batch_size():
+    async def _test(session_maker):
+        async with session_maker() as session:
+            await async_stage_log_crud.open_stage_log(
+                session, StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+            )
+
+        writer = BufferedStageLogMessageWriter(
+            session_maker=session_maker, max_batch_size=2, flush_interval=60
+        )
+        writer.start()
+        for index in range(2):
+            await writer.add(
+                StageLogMessage.Add(stage_log_id=1, message=str(index), is_error=False)
+            )
+
+        for _ in range(100):
+            if len(await get_messages(session_maker)) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert len(await get_messages(session_maker)) == 2
+        await writer.close()
+
+    run_with_session_maker(_test)
+
+
+def test_buffered_writer_flushes_on_interval():
+    async def _test(session_maker):
+        async with session_maker() as session:
+            await async_stage_log_crud.open_stage_log(
+                session, StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+            )
+
+        writer = BufferedStageLogMessageWriter(
+            session_maker=session_maker, max_batch_size=100, flush_interval=0.05
+        )
+        writer.start()
+        await writer.add(
+            StageLogMessage.Add(stage_log_id=1, message="1", is_error=False)
+        )
+
+        await asyncio.sleep(0.3)
+        assert len(await get_messages(session_maker)) == 1
+        await writer.close()
+
+    run_with_session_maker(_test)
+
+
+def test_buffered_writer_flush_before_close_stage_log():
+    async def _test(session_maker):
+        async with session_maker() as session:
+            await async_stage_log_crud.open_stage_log(
+                session, StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+            )
+
+        writer = BufferedStageLogMessageWriter(
+            session_maker=session_maker, max_batch_size=100, flush_interval=60
+        )
+        writer.start()
+        await writer.add(
+            StageLogMessage.Add(stage_log_id=1, message="1", is_error=False)
+        )
+        await writer.flush()
+        assert len(await get_messages(session_maker)) == 1
+
+        async with session_maker() as session:
+            await async_stage_log_crud.close_stage_log(
+                session, StageLog.Close(id=1, success=True)
+            )
+        await writer.close()
+
+    run_with_session_maker(_test)
+
+
+def test_buffered_writer_drops_only_closed_stage_log_messages():
+    async def _test(session_maker):
+        async with session_maker() as session:
+            for _ in range(2):
+                await async_stage_log_crud.open_stage_log(
+                    session, StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+                )
+            await async_stage_log_crud.close_stage_log(
+                session, StageLog.Close(id=1, success=True)
+            )
+
+        writer = BufferedStageLogMessageWriter(
+            session_maker=session_maker, max_batch_size=100, flush_interval=60
+        )
+        writer.start()
+        await writer.add(
+            StageLogMessage.Add(stage_log_id=1, message="1", is_error=False)
+        )
+        await writer.add(
+            StageLogMessage.Add(stage_log_id=2, message="2", is_error=False)
+        )
+        await writer.close()
+
+        messages = await get_messages(session_maker)
+        assert [message.stage_log_id for message in messages] == [2]
+
+    run_with_session_maker(_test)
+
+
+def test_buffered_writer_flush_threadsafe():
+    async def _test(session_maker):
+        async with session_maker() as session:
+            await async_stage_log_crud.open_stage_log(
+                session, StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+            )
+
+        writer = BufferedStageLogMessageWriter(
+            session_maker=session_maker, max_batch_size=100, flush_interval=60
+        )
+        writer.start()
+        await writer.add(
+            StageLogMessage.Add(stage_log_id=1, message="1", is_error=False)
+        )
+        # On the loop of the writer it returns without waiting instead of blocking it.
+        writer.flush_threadsafe()
+        assert len(await get_messages(session_maker)) == 0
+
+        # Synchronous code in another thread, like the orchestration closing a stage_log.
+        await asyncio.to_thread(writer.flush_threadsafe)
+        assert len(await get_messages(session_maker)) == 1
+        await writer.close()
+
+    run_with_session_maker(_test)
+
+
+def test_buffered_writer_not_running_in_forked_process():
+    async def _test(session_maker):
+        writer = BufferedStageLogMessageWriter(session_maker=session_maker)
+        writer.start()
+        assert writer.is_running
+
+        # A forked process sees the task of its parent, without the loop running it.
+        context = multiprocessing.get_context("fork")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=lambda: sender.send(writer.is_running))
+        process.start()
+        assert not receiver.recv()
+        process.join()
+        await writer.close()
+
+    run_with_session_maker(_test)
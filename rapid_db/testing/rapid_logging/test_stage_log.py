@@ -90,3 +90,89 @@ def test_delete_stage_log_invalid(session: Session):
     with pytest.raises(ValueError) as exception_info:
         stage_log_crud.delete_stage_log(session, stage_log_id=1)
     assert str(exception_info.value) == "404: stage_log with ID: 1 not found."
+
+
+def test_get_stage_logs_page(session: Session):
+    for _ in range(3):
+        stage_log_crud.open_stage_log(session, valid_stage_log)
+
+    first_page, cursor = stage_log_crud.get_stage_logs_page(session, limit=2)
+    assert [db_stage_log.id for db_stage_log in first_page] == [1, 2]
+
+    last_page, cursor = stage_log_crud.get_stage_logs_page(
+        session, cursor=cursor, limit=2
+    )
+    assert [db_stage_log.id for db_stage_log in last_page] == [3]
+    assert cursor is None
+
+
+def test_iter_stage_logs(session: Session):
+    for _ in range(3):
+        stage_log_crud.open_stage_log(session, valid_stage_log)
+
+    db_stage_logs = list(stage_log_crud.iter_stage_logs(session, yield_per=2))
+    assert [db_stage_log.id for db_stage_log in db_stage_logs] == [1, 2, 3]
+
+
+def run_stage_log(session: Session, cdc_key: int, success: bool, table_id: int = 1):
+    db_stage_log = stage_log_crud.open_stage_log(
+        session, StageLog.Open(table_id=table_id, stage_id=1, cdc_key=cdc_key)
+    )
+    return stage_log_crud.close_stage_log(
+        session,
+        StageLog.Close(
+            id=db_stage_log.id, success=success, number_of_records_processed=cdc_key
+        ),
+    )
+
+
+def test_close_stage_log_updates_summary(session: Session):
+    run_stage_log(session, cdc_key=200, success=True)
+    # A late success of an older cdc_key does not move the last successful run back.
+    run_stage_log(session, cdc_key=100, success=True)
+    last_stage_log = run_stage_log(session, cdc_key=300, success=False)
+    run_stage_log(session, cdc_key=100, success=False, table_id=2)
+
+    summaries = stage_log_crud.get_stage_log_summaries(session)
+
+    assert [summary.table_id for summary in summaries] == [1, 2]
+    summary = summaries[0]
+    assert summary.last_stage_log_id == last_stage_log.id
+    assert summary.last_cdc_key == 300
+    assert summary.last_success is False
+    assert summary.last_number_of_records_processed == 300
+    assert summary.last_duration_seconds >= 0
+    assert summary.last_successful_stage_log_id == 1
+    assert summary.last_successful_cdc_key == 200
+    assert summaries[1].last_successful_cdc_key is None
+    assert stage_log_crud.get_stage_log_summaries(session, table_ids=[2]) == [
+        summaries[1]
+    ]
+
+
+def test_rebuild_stage_log_summaries(session: Session):
+    run_stage_log(session, cdc_key=200, success=True)
+    run_stage_log(session, cdc_key=100, success=True)
+    run_stage_log(session, cdc_key=300, success=False)
+    stage_log_crud.open_stage_log(session, valid_stage_log)
+    expected = [
+        summary.model_dump()
+        for summary in stage_log_crud.get_stage_log_summaries(session)
+    ]
+
+    assert stage_log_crud.rebuild_stage_log_summaries(session) == 1
+    assert [
+        summary.model_dump()
+        for summary in stage_log_crud.get_stage_log_summaries(session)
+    ] == expected
+
+
+def test_delete_stage_logs(session: Session):
+    for cdc_key in range(5):
+        run_stage_log(session, cdc_key=cdc_key, success=True)
+
+    assert stage_log_crud.delete_stage_logs(session, [1, 2, 3, 9], chunk_size=2) == 3
+
+    remaining = stage_log_crud.get_stage_logs_page(session)[0]
+    assert [db_stage_log.id for db_stage_log in remaining] == [4, 5]
+    assert stage_log_crud.get_stage_log_summaries(session)[0].last_stage_log_id == 5
@@ -101,3 +101,56 @@ def test_adding_stage_log_message_to_closed_stage_log(session: Session):
         str(exception_info.value)
         == "403: Forbidden to add stage_log_messages to closed stage_log with ID: 1."
     )
+
+
+def test_add_many_stage_log_messages(session: Session):
+    stage_log = StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+    stage_log_crud.open_stage_log(session=session, stage_log=stage_log)
+    stage_log_crud.open_stage_log(session=session, stage_log=stage_log)
+
+    stage_log_messages = [
+        StageLogMessage.Add(stage_log_id=1, message="1", is_error=False),
+        StageLogMessage.Add(stage_log_id=2, message="2", is_error=True),
+        StageLogMessage.Add(stage_log_id=1, message="3", is_error=False),
+    ]
+    result = stage_log_message_crud.add_many(session, stage_log_messages)
+    assert result == {"ok": True, "number_of_stage_log_messages": 3}
+
+    db_stage_log_message = stage_log_message_crud.get_stage_log_message_on_id(
+        session, 3
+    )
+    assert db_stage_log_message.stage_log_id == 1
+    assert db_stage_log_message.message == "3"
+    assert isinstance(db_stage_log_message.datetime_stage_log_message, datetime)
+
+
+def test_add_many_stage_log_messages_missing_stage_log(session: Session):
+    with pytest.raises(ValueError) as exception_info:
+        stage_log_message_crud.add_many(session, [valid_stage_log_message])
+
+    assert str(exception_info.value) == "404: stage_logs with IDs: [1] not found."
+
+
+def test_add_many_stage_log_messages_to_closed_stage_log(session: Session):
+    stage_log_open = StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+    stage_log_crud.open_stage_log(session=session, stage_log=stage_log_open)
+    stage_log_crud.open_stage_log(session=session, stage_log=stage_log_open)
+
+    stage_log_close = StageLog.Close(id=1, success=True, number_of_records_processed=1)
+    stage_log_crud.close_stage_log(session, stage_log_close)
+
+    with pytest.raises(ValueError) as exception_info:
+        stage_log_message_crud.add_many(
+            session,
+            [
+                valid_stage_log_message,
+                StageLogMessage.Add(stage_log_id=2, message="2", is_error=False),
+            ],
+        )
+
+    assert (
+        str(exception_info.value)
+        == "403: Forbidden to add stage_log_messages to closed stage_logs with IDs: [1]."
+    )
+    with pytest.raises(ValueError):
+        stage_log_message_crud.get_stage_log_message_on_id(session, 1)
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from sqlmodel import SQLModel
+from sqlalchemy.ext.asyncio import create_async_engine
+from ..async_database import create_async_session_maker
+from ..crud.async_catalog import async_table_crud
+from ..crud.async_rapid_logging import (
+    async_stage_log_crud,
+    async_stage_log_message_crud,
+)
+from ..models.catalog import Table
+from ..models.rapid_logging import StageLog, StageLogMessage
+
+
+def run_with_async_session(test):
+    async def _run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        async with create_async_session_maker(engine)() as session:
+            await test(session)
+        await engine.dispose()
+
+    asyncio.run(_run())
+
+
+valid_table = Table.Create(
+    name="1", description="1", source_location="1", stage_id=1, source_id=1
+)
+
+
+def test_async_table_crud():
+    async def _test(session):
+        created_table = await async_table_crud.insert_into_table(session, valid_table)
+        assert created_table.id == 1
+
+        await async_table_crud.update_table_on_pk(
+            session, Table.Update(id=1, description="2")
+        )
+        db_table = await async_table_crud.select_on_pk(session, 1)
+        assert db_table.description == "2"
+
+        ids = await async_table_crud.insert_many(
+            session,
+            [
+                Table.Create(name="2", source_location="2", stage_id=1, source_id=1),
+                Table.Create(name="3", source_location="3", stage_id=1, source_id=1),
+            ],
+        )
+        assert ids == [2, 3]
+
+        page, cursor = await async_table_crud.select_page(session, limit=2)
+        assert [db_table.id for db_table in page] == [1, 2]
+        assert cursor is not None
+
+        db_tables = [db_table async for db_table in async_table_crud.iter_all(session)]
+        assert [db_table.id for db_table in db_tables] == [1, 2, 3]
+
+        await async_table_crud.delete_from_table(session, 1, hard_delete=True)
+        with pytest.raises(ValueError) as exception_info:
+            await async_table_crud.select_on_pk(session, 1)
+        assert str(exception_info.value) == "404: table with ID: 1 not found."
+
+    run_with_async_session(_test)
+
+
+def test_async_stage_log_crud():
+    async def _test(session):
+        db_stage_log = await async_stage_log_crud.open_stage_log(
+            session, StageLog.Open(table_id=1, stage_id=1, cdc_key=1)
+        )
+        assert db_stage_log.is_open
+
+        db_stage_log_message = await async_stage_log_message_crud.add_stage_log_message(
+            session,
+            StageLogMessage.Add(
+                stage_log_id=db_stage_log.id, message="test", is_error=False
+            ),
+        )
+        assert db_stage_log_message.id == 1
+
+        db_stage_log = await async_stage_log_crud.close_stage_log(
+            session,
+            StageLog.Close(
+                id=db_stage_log.id, success=True, number_of_records_processed=1
+            ),
+        )
+        assert not db_stage_log.is_open
+        assert db_stage_log.success
+
+        with pytest.raises(ValueError) as exception_info:
+            await async_stage_log_message_crud.add_stage_log_message(
+                session,
+                StageLogMessage.Add(stage_log_id=1, message="test", is_error=False),
+            )
+        assert str(exception_info.value).startswith("403")
+
+    run_with_async_session(_test)
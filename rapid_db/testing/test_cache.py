@@ -0,0 +1,41 @@
+from ..cache import TTLCache
+
+
+def test_cache_get_set():
+    cache = TTLCache()
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", 2) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_cache_expires(monkeypatch):
+    cache = TTLCache(ttl=10)
+    monkeypatch.setattr("time.monotonic", lambda: 0)
+    cache.set("a", 1)
+
+    monkeypatch.setattr("time.monotonic", lambda: 11)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.clear()
+
+    assert cache.get("a") is None
@@ -0,0 +1,72 @@
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine
+from ..database import DatabaseSettings, create_rapid_engine, migrate_database
+from ..models import catalog, rapid_logging  # noqa: F401
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("RAPID_DB_URL", "postgresql://user@localhost/rapid")
+    monkeypatch.setenv("RAPID_DB_POOL_SIZE", "20")
+    monkeypatch.setenv("RAPID_DB_ECHO", "true")
+
+    settings = DatabaseSettings.from_env()
+
+    assert settings.url == "postgresql://user@localhost/rapid"
+    assert settings.pool_size == 20
+    assert settings.echo
+    assert settings.max_overflow == 10
+
+
+def test_settings_defaults():
+    settings = DatabaseSettings()
+
+    assert not settings.echo
+    assert settings.pool_pre_ping
+
+
+def test_sqlite_file_engine_pragmas(tmp_path):
+    settings = DatabaseSettings(url=f"sqlite:///{tmp_path / 'rapid_db.db'}")
+    engine = create_rapid_engine(settings)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("pragma foreign_keys")).scalar() == 1
+        assert connection.execute(text("pragma journal_mode")).scalar() == "wal"
+        # NORMAL
+        assert connection.execute(text("pragma synchronous")).scalar() == 1
+        assert connection.execute(text("pragma busy_timeout")).scalar() == 5000
+        assert connection.execute(text("pragma cache_size")).scalar() == -64000
+    assert not engine.echo
+
+
+def test_sqlite_memory_engine_pragmas():
+    engine = create_rapid_engine(DatabaseSettings(url="sqlite://"))
+
+    with engine.connect() as connection:
+        assert connection.execute(text("pragma foreign_keys")).scalar() == 1
+        assert connection.execute(text("pragma journal_mode")).scalar() == "memory"
+
+
+def test_migrate_database():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    # The schema from before is_watermark and the stage_logs index were added.
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX unique_column_watermark_table_id"))
+        connection.execute(
+            text("DROP INDEX ix_stage_logs_table_id_stage_id_success_cdc_key")
+        )
+        connection.execute(text("ALTER TABLE columns DROP COLUMN is_watermark"))
+
+    migrate_database(engine)
+    migrate_database(engine)
+
+    inspector = inspect(engine)
+    assert "is_watermark" in {
+        column["name"] for column in inspector.get_columns("columns")
+    }
+    assert "unique_column_watermark_table_id" in {
+        index["name"] for index in inspector.get_indexes("columns")
+    }
+    assert "ix_stage_logs_table_id_stage_id_success_cdc_key" in {
+        index["name"] for index in inspector.get_indexes("stage_logs")
+    }
@@ -0,0 +1,158 @@
+import polars as pl
+import pytest
+from sqlmodel import Session
+from ..crud.base import get_catalog_version
+from ..crud.catalog import source_crud, stage_crud, table_crud
+from ..metadata import (
+    NATURAL_KEY_REFERENCES,
+    CatalogIndex,
+    resolve_natural_keys,
+    sync_metadata,
+    validate_metadata,
+)
+from ..models.catalog import Source, Stage, Table, Column
+
+
+def get_metadata(**sheets: pl.DataFrame) -> dict:
+    metadata = {
+        "sources": pl.DataFrame(
+            {"name": ["source"], "description": ["1"], "connection_details": ["1"]}
+        ),
+        "stages": pl.DataFrame({"name": ["stage"], "description": ["1"]}),
+        "data_type_mappings": pl.DataFrame(
+            {
+                "source_data_type": ["text"],
+                "sql_type": ["VARCHAR"],
+                "parquet_type": ["string"],
+                "source_name": ["source"],
+            }
+        ),
+        "tables": pl.DataFrame(
+            {
+                "name": ["table"],
+                "source_location": ["location"],
+                "source_name": ["source"],
+                "stage_name": ["stage"],
+            }
+        ),
+        "columns": pl.DataFrame(
+            {
+                "name": ["column"],
+                "data_type": ["text"],
+                "length": [None],
+                "nullable": [True],
+                "precision": [None],
+                "scale": [None],
+                "table_name": ["table"],
+                "stage_name": ["stage"],
+                "source_name": ["source"],
+                "source_data_type": ["text"],
+            }
+        ),
+    }
+    metadata.update(sheets)
+    return metadata
+
+
+def test_validate_metadata(session: Session):
+    df = pl.DataFrame(
+        {
+            "name": ["1", None, "x" * 300],
+            "source_location": ["1", "2", "3"],
+            "stage_id": ["1", "one", "1"],
+        }
+    )
+    df_valid, errors = validate_metadata(session, df=df, object_type=Table)
+
+    assert df_valid.columns == ["name", "source_location", "stage_id"]
+    assert df_valid.schema["stage_id"] == pl.Int64
+    assert "column source_id is missing" in errors
+    assert "column name can not be empty on lines: [3]" in errors
+    assert "column stage_id is not of type int on lines: [3]" in errors
+    assert any(
+        error.startswith("column name is longer than") and error.endswith("[4]")
+        for error in errors
+    )
+    assert (
+        "column stage_id references a missing record in stages on lines: [2, 4]"
+        in errors
+    )
+
+
+def test_validate_metadata_fills_defaults(session: Session):
+    stage_crud.insert_into_table(session, Stage.Create(name="stage"))
+    df = pl.DataFrame({"name": ["stage"], "description": [None]})
+    df_valid, errors = validate_metadata(session, df=df, object_type=Stage)
+
+    assert errors == []
+    assert df_valid.to_dicts() == [{"name": "stage", "description": None}]
+
+
+def test_resolve_natural_keys(session: Session):
+    source_crud.insert_into_table(
+        session, Source.Create(name="source", connection_details="1")
+    )
+    stage_crud.insert_into_table(session, Stage.Create(name="stage"))
+    df = pl.DataFrame(
+        {
+            "name": ["1", "2", "3"],
+            "source_id": [None, None, 5],
+            "source_name": ["source", "missing", None],
+            "stage_name": ["stage", "stage", "stage"],
+        }
+    )
+    df_resolved, errors = resolve_natural_keys(
+        df, references=NATURAL_KEY_REFERENCES["tables"], index=CatalogIndex(session)
+    )
+
+    assert df_resolved.columns == ["name", "source_id", "stage_id"]
+    # Ids given in the sheet take precedence over the names.
+    assert df_resolved.get_column("source_id").to_list() == ["1", None, "5"]
+    assert df_resolved.get_column("stage_id").to_list() == [1, 1, 1]
+    assert errors == [
+        "key source_name references a missing record in sources on lines: [3]"
+    ]
+
+
+def test_resolve_natural_keys_ambiguous(session: Session):
+    for connection_details in ["1", "2"]:
+        source_crud.insert_into_table(
+            session, Source.Create(name="source", connection_details=connection_details)
+        )
+    df = pl.DataFrame({"name": ["1"], "source_name": ["source"]})
+    df_resolved, errors = resolve_natural_keys(
+        df, references=NATURAL_KEY_REFERENCES["tables"], index=CatalogIndex(session)
+    )
+
+    assert df_resolved.get_column("source_id").to_list() == [None]
+    assert errors == [
+        "key source_name matches more than one record in sources on lines: [2]"
+    ]
+
+
+def test_sync_metadata(session: Session):
+    result = sync_metadata(session, get_metadata())
+
+    assert result["columns"] == {"inserted": 1, "updated": 0, "deactivated": 0}
+    db_table = table_crud.select_on_pk(session, model_id=1)
+    assert db_table.source_id == 1
+    assert db_table.stage_id == 1
+    assert session.get(Column, 1).data_type_mapping_id == 1
+    version = get_catalog_version(session)
+
+    result = sync_metadata(session, get_metadata())
+    assert result["columns"] == {"inserted": 0, "updated": 0, "deactivated": 0}
+    assert get_catalog_version(session) == version
+
+
+def test_sync_metadata_invalid_sheet_rolls_back(session: Session):
+    columns = get_metadata()["columns"].with_columns(
+        pl.lit("missing").alias("table_name")
+    )
+    with pytest.raises(ValueError, match="422: invalid metadata in sheet: columns"):
+        sync_metadata(session, get_metadata(columns=columns))
+
+    # The sheets before the invalid one are not applied either.
+    assert list(source_crud.iter_all(session)) == []
+    assert list(table_crud.iter_all(session)) == []
+    assert get_catalog_version(session) == 0
@@ -0,0 +1,71 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+from sqlmodel import Session, SQLModel, create_engine
+from datetime import date
+from ..models.rapid_logging import StageLog, StageLogMessage
+from ..partitioning import (
+    add_months,
+    create_partitions,
+    drop_partitions_before,
+    get_partition_key,
+    list_partitions,
+    maintain_partitions,
+    migrate_to_partitioned,
+)
+
+
+def test_create_table_postgres():
+    ddl = str(
+        CreateTable(StageLogMessage.__table__).compile(dialect=postgresql.dialect())
+    )
+
+    assert "id SERIAL NOT NULL" in ddl
+    assert "PRIMARY KEY (id, datetime_stage_log_message)" in ddl
+    # The model itself keeps id as its only primary key.
+    assert StageLogMessage.__table__.primary_key.columns.keys() == ["id"]
+    assert "PARTITION BY RANGE (datetime_stage_log_message)" in ddl
+
+
+def test_create_table_not_partitioned():
+    ddl = str(CreateTable(StageLogMessage.__table__).compile(dialect=sqlite.dialect()))
+    assert "PRIMARY KEY (id)" in ddl
+    assert "PARTITION" not in ddl
+
+    ddl = str(CreateTable(StageLog.__table__).compile(dialect=postgresql.dialect()))
+    assert "PRIMARY KEY (id)" in ddl
+    assert "PARTITION" not in ddl
+
+
+def test_add_months():
+    assert add_months(date(2024, 11, 1), 1) == date(2024, 12, 1)
+    assert add_months(date(2024, 12, 1), 1) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+
+def test_partitions_sqlite(session: Session):
+    connection = session.connection()
+
+    assert create_partitions(connection, "stage_log_messages") == []
+    assert list_partitions(connection, "stage_log_messages") == []
+    assert (
+        drop_partitions_before(connection, "stage_log_messages", date(2024, 1, 1)) == []
+    )
+    assert migrate_to_partitioned(connection, "stage_log_messages") == {
+        "ok": True,
+        "migrated": False,
+    }
+
+
+def test_get_partition_key():
+    assert get_partition_key("stage_log_messages") == "datetime_stage_log_message"
+
+
+def test_maintain_partitions_sqlite():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+
+    assert maintain_partitions(engine, retention_days=30) == {
+        "ok": True,
+        "created_partitions": [],
+        "dropped_partitions": [],
+    }
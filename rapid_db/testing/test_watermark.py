@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from ..crud.rapid_logging import stage_log_crud
+from ..models.catalog import Column
+from ..models.rapid_logging import StageLog
+from ..watermark import get_table_watermarks, validate_cdc_key
+from datetime import datetime
+
+
+def run_stage_log(session: Session, table_id: int, cdc_key: int, success: bool):
+    db_stage_log = stage_log_crud.open_stage_log(
+        session, StageLog.Open(table_id=table_id, stage_id=1, cdc_key=cdc_key)
+    )
+    stage_log_crud.close_stage_log(
+        session, StageLog.Close(id=db_stage_log.id, success=success)
+    )
+    return db_stage_log.id
+
+
+def test_get_table_watermarks(session: Session):
+    run_stage_log(session, table_id=1, cdc_key=100, success=True)
+    last_successful_id = run_stage_log(session, table_id=1, cdc_key=200, success=True)
+    run_stage_log(session, table_id=1, cdc_key=300, success=False)
+    run_stage_log(session, table_id=2, cdc_key=400, success=False)
+    # Open stage_logs are still running and do not count.
+    stage_log_crud.open_stage_log(
+        session, StageLog.Open(table_id=1, stage_id=1, cdc_key=500)
+    )
+    session.add(
+        Column(
+            name="modified_at",
+            data_type="datetime",
+            table_id=1,
+            data_type_mapping_id=1,
+            is_watermark=True,
+        )
+    )
+    session.add(Column(name="id", data_type="int", table_id=2, data_type_mapping_id=1))
+    session.commit()
+
+    watermarks = get_table_watermarks(session, [1, 2, 3])
+
+    assert watermarks[1].cdc_key == 200
+    assert watermarks[1].stage_log_id == last_successful_id
+    assert watermarks[1].watermark_column == "modified_at"
+    assert watermarks[1].watermark_value == datetime.fromtimestamp(200)
+    assert watermarks[1].is_incremental
+    assert watermarks[2].cdc_key is None
+    assert watermarks[2].watermark_column is None
+    assert not watermarks[2].is_incremental
+    assert not watermarks[3].is_incremental
+
+
+def test_get_table_watermarks_empty(session: Session):
+    assert get_table_watermarks(session, []) == {}
+
+
+def test_one_watermark_column_per_table(session: Session):
+    for name in ["created_at", "modified_at"]:
+        session.add(
+            Column(
+                name=name,
+                data_type="datetime",
+                table_id=1,
+                data_type_mapping_id=1,
+                is_watermark=True,
+            )
+        )
+    with pytest.raises(IntegrityError):
+        session.commit()
+
+
+def test_validate_cdc_key():
+    assert validate_cdc_key(1718000000) == 1718000000
+    # Milliseconds and counters are not Unix timestamps in seconds.
+    for cdc_key in [1718000000000, 1, -1]:
+        with pytest.raises(ValueError, match="400: cdc_key"):
+            validate_cdc_key(cdc_key)
@@ -0,0 +1,186 @@
+import pytest
+import time
+from sqlmodel import Session, SQLModel, create_engine
+from ..models.rapid_logging import StageLog  # noqa: F401, creates stage_logs
+from ..models.work_queue import WorkItem, WorkItemStatus
+from ..crud.work_queue import LeaseHeartbeat, WorkItemCrud
+from datetime import datetime, timedelta
+
+work_item_crud = WorkItemCrud(backoff_seconds=10.0)
+
+work_items = [
+    WorkItem.Enqueue(table_id=table_id, stage_id=1, cdc_key=1, max_attempts=2)
+    for table_id in [1, 2]
+]
+
+
+def test_enqueue_many(session: Session):
+    assert work_item_crud.enqueue_many(session, work_items) == 2
+    # Enqueueing the same load again adds nothing.
+    assert work_item_crud.enqueue_many(session, work_items) == 0
+    assert work_item_crud.count_by_status(session, cdc_key=1) == {
+        "pending": 2,
+        "running": 0,
+        "succeeded": 0,
+        "failed": 0,
+    }
+
+
+def test_claim(session: Session):
+    work_item_crud.enqueue_many(session, work_items)
+
+    first = work_item_crud.claim(session, worker_id="a")
+    second = work_item_crud.claim(session, worker_id="b")
+
+    assert first.table_id == 1
+    assert first.status == WorkItemStatus.running
+    assert first.attempts == 1
+    assert first.worker_id == "a"
+    assert first.lease_expires_at > datetime.now()
+    assert second.table_id == 2
+    assert work_item_crud.claim(session, worker_id="c") is None
+
+
+def test_claim_filtered(session: Session):
+    work_item_crud.enqueue_many(session, work_items)
+
+    assert work_item_crud.claim(session, worker_id="a", cdc_key=2) is None
+    assert work_item_crud.claim(session, worker_id="a", stage_id=2) is None
+    assert work_item_crud.claim(session, worker_id="a", stage_id=1).table_id == 1
+
+
+def test_claim_expired_lease(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    work_item_crud.claim(session, worker_id="a", lease_seconds=-1)
+
+    reclaimed = work_item_crud.claim(session, worker_id="b")
+
+    assert reclaimed.worker_id == "b"
+    assert reclaimed.attempts == 2
+
+
+def test_fail_exhausted(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    work_item_crud.claim(session, worker_id="a", lease_seconds=-1)
+    work_item_crud.claim(session, worker_id="b", lease_seconds=-1)
+
+    assert work_item_crud.claim(session, worker_id="c") is None
+    assert work_item_crud.fail_exhausted(session) == 1
+    assert work_item_crud.get_work_item_on_id(session, 1).status == "failed"
+
+
+def test_complete_success(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    db_work_item = work_item_crud.claim(session, worker_id="a")
+
+    completed = work_item_crud.complete(
+        session,
+        WorkItem.Complete(
+            id=db_work_item.id,
+            worker_id="a",
+            success=True,
+            stage_log_id=1,
+            number_of_records_processed=10,
+        ),
+    )
+
+    assert completed.status == WorkItemStatus.succeeded
+    assert completed.lease_expires_at is None
+    assert completed.number_of_records_processed == 10
+    assert work_item_crud.claim(session, worker_id="a") is None
+
+
+def test_complete_failure_retries_with_backoff(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    db_work_item = work_item_crud.claim(session, worker_id="a")
+
+    completed = work_item_crud.complete(
+        session,
+        WorkItem.Complete(id=db_work_item.id, worker_id="a", success=False, error="x"),
+    )
+
+    assert completed.status == WorkItemStatus.pending
+    assert completed.last_error == "x"
+    assert completed.available_at > datetime.now() + timedelta(seconds=5)
+    # The retry is not available before its backoff passed.
+    assert work_item_crud.claim(session, worker_id="a") is None
+
+    completed.available_at = datetime.now()
+    session.add(completed)
+    session.commit()
+    db_work_item = work_item_crud.claim(session, worker_id="a")
+    completed = work_item_crud.complete(
+        session,
+        WorkItem.Complete(id=db_work_item.id, worker_id="a", success=False),
+    )
+
+    assert db_work_item.attempts == 2
+    assert completed.status == WorkItemStatus.failed
+
+
+def test_complete_not_leased(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    work_item_crud.claim(session, worker_id="a")
+
+    with pytest.raises(ValueError) as exception_info:
+        work_item_crud.complete(
+            session, WorkItem.Complete(id=1, worker_id="b", success=True)
+        )
+    assert (
+        str(exception_info.value)
+        == "409: work_item with ID: 1 is not leased by worker: b."
+    )
+
+
+def test_extend_lease(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    db_work_item = work_item_crud.claim(session, worker_id="a", lease_seconds=1)
+
+    extended = work_item_crud.extend_lease(
+        session, db_work_item.id, worker_id="a", lease_seconds=600
+    )
+
+    assert extended.lease_expires_at > datetime.now() + timedelta(seconds=500)
+
+
+def test_lease_heartbeat(tmp_path):
+    # The heartbeat uses sessions of its own, so the database must be shared between
+    # connections.
+    engine = create_engine(f"sqlite:///{tmp_path / 'work_queue.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        work_item_crud.enqueue_many(session, work_items[:1])
+        db_work_item = work_item_crud.claim(session, worker_id="a", lease_seconds=0.3)
+
+        with LeaseHeartbeat(
+            work_item_crud,
+            lambda: Session(engine),
+            db_work_item.id,
+            worker_id="a",
+            lease_seconds=0.3,
+            interval=0.1,
+        ) as heartbeat:
+            # Processing takes longer than the lease, the renewed lease keeps others away.
+            time.sleep(0.8)
+            assert work_item_crud.claim(session, worker_id="b") is None
+
+        assert not heartbeat.is_lost
+        completed = work_item_crud.complete(
+            session, WorkItem.Complete(id=db_work_item.id, worker_id="a", success=True)
+        )
+        assert completed.status == WorkItemStatus.succeeded
+
+
+def test_lease_expires_during_processing(session: Session):
+    work_item_crud.enqueue_many(session, work_items[:1])
+    db_work_item = work_item_crud.claim(session, worker_id="a", lease_seconds=0.1)
+
+    # Without a heartbeat the lease expires while processing and another worker takes over.
+    time.sleep(0.2)
+    assert work_item_crud.claim(session, worker_id="b").worker_id == "b"
+
+    with pytest.raises(ValueError) as exception_info:
+        work_item_crud.complete(
+            session, WorkItem.Complete(id=db_work_item.id, worker_id="a", success=True)
+        )
+    assert str(exception_info.value).startswith("409")
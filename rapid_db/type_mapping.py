@@ -0,0 +1,92 @@
+from sqlmodel import Session, select
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping
+from .models.catalog import Column, DataTypeMapping
+from .crud.catalog import data_type_mapping_crud
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+RESOLVER_CACHE_KEY = "data_type_resolver"
+
+
+class DataTypeResolver:
+    # All active data_type_mappings compiled into read-only lookups, resolving a type is
+    # a dict lookup instead of a query.
+    def __init__(self, data_type_mappings: Iterable[DataTypeMapping.Return]):
+        per_source: Dict[int, Dict[str, DataTypeMapping.Return]] = {}
+        per_id: Dict[int, DataTypeMapping.Return] = {}
+        for data_type_mapping in data_type_mappings:
+            per_source.setdefault(data_type_mapping.source_id, {})[
+                data_type_mapping.source_data_type
+            ] = data_type_mapping
+            per_id[data_type_mapping.id] = data_type_mapping
+
+        self.per_source: Mapping[int, Mapping[str, DataTypeMapping.Return]] = (
+            MappingProxyType(
+                {
+                    source_id: MappingProxyType(mappings)
+                    for source_id, mappings in per_source.items()
+                }
+            )
+        )
+        self.per_id: Mapping[int, DataTypeMapping.Return] = MappingProxyType(per_id)
+
+    @classmethod
+    def from_session(cls, session: Session) -> "DataTypeResolver":
+        db_data_type_mappings = session.exec(
+            select(DataTypeMapping).where(DataTypeMapping.is_active)
+        ).all()
+        return cls(
+            DataTypeMapping.Return.model_validate(db_data_type_mapping)
+            for db_data_type_mapping in db_data_type_mappings
+        )
+
+    def get_source_mappings(
+        self, source_id: int
+    ) -> Mapping[str, DataTypeMapping.Return]:
+        return self.per_source.get(source_id, MappingProxyType({}))
+
+    def resolve(self, source_id: int, source_data_type: str) -> DataTypeMapping.Return:
+        data_type_mapping = self.get_source_mappings(source_id).get(source_data_type)
+        if data_type_mapping is None:
+            logger.warning(
+                f"No data_type_mapping found for source_data_type: {source_data_type} and source_id: {source_id}"
+            )
+            raise ValueError(
+                f"404: data_type_mapping with source_data_type: {source_data_type} and source_id: {source_id} not found."
+            )
+        return data_type_mapping
+
+    def resolve_many(
+        self, source_id: int, source_data_types: Iterable[str]
+    ) -> List[DataTypeMapping.Return]:
+        return [
+            self.resolve(source_id, source_data_type)
+            for source_data_type in source_data_types
+        ]
+
+    def resolve_columns(
+        self, columns: Iterable[Column]
+    ) -> Dict[str, DataTypeMapping.Return]:
+        # Columns reference their mapping directly, the result keeps the column order.
+        schema = {}
+        for column in columns:
+            data_type_mapping = self.per_id.get(column.data_type_mapping_id)
+            if data_type_mapping is None:
+                raise ValueError(
+                    f"404: data_type_mapping with ID: {column.data_type_mapping_id} not found."
+                )
+            schema[column.name] = data_type_mapping
+        return schema
+
+
+def get_data_type_resolver(session: Session) -> DataTypeResolver:
+    # The compiled resolver lives in the data_type_mapping cache, so any write to the
+    # data_type_mappings through the crud rebuilds it on the next call.
+    resolver = data_type_mapping_crud.cache.get(RESOLVER_CACHE_KEY)
+    if resolver is None:
+        resolver = DataTypeResolver.from_session(session)
+        data_type_mapping_crud.cache.set(RESOLVER_CACHE_KEY, resolver)
+    return resolver
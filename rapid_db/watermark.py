@@ -0,0 +1,77 @@
+from sqlmodel import Session, SQLModel, select
+from datetime import datetime
+from typing import Dict, Iterable
+from .models.catalog import Column, Table
+from .models.rapid_logging import StageLogSummary
+
+# A cdc_key is the Unix timestamp in seconds at which a load started, the bounds reject
+# keys in milliseconds or arbitrary counters.
+MIN_CDC_KEY = 946684800  # 2000-01-01
+MAX_CDC_KEY = 4102444800  # 2100-01-01
+
+
+def validate_cdc_key(cdc_key: int) -> int:
+    if not MIN_CDC_KEY <= cdc_key < MAX_CDC_KEY:
+        raise ValueError(
+            f"400: cdc_key must be a Unix timestamp in seconds, got: {cdc_key}."
+        )
+    return cdc_key
+
+
+class TableWatermark(SQLModel, table=False):
+    table_id: int
+    # The cdc_key of the last successful run, this run started at that timestamp so
+    # every record changed after it is new to the table.
+    cdc_key: int | None = None
+    stage_log_id: int | None = None
+    watermark_column: str | None = None
+
+    @property
+    def watermark_value(self) -> datetime | None:
+        if self.cdc_key is None:
+            return None
+        return datetime.fromtimestamp(self.cdc_key)
+
+    @property
+    def is_incremental(self) -> bool:
+        return self.watermark_column is not None and self.cdc_key is not None
+
+
+def get_table_watermarks(
+    session: Session, table_ids: Iterable[int]
+) -> Dict[int, TableWatermark]:
+    # Two queries for any number of tables, one on the stage_log_summaries for the last
+    # successful run and one for the declared watermark columns.
+    table_ids = list(table_ids)
+    watermarks = {table_id: TableWatermark(table_id=table_id) for table_id in table_ids}
+    if not table_ids:
+        return watermarks
+
+    for table_id, cdc_key, stage_log_id in session.exec(
+        select(
+            StageLogSummary.table_id,
+            StageLogSummary.last_successful_cdc_key,
+            StageLogSummary.last_successful_stage_log_id,
+        ).where(
+            StageLogSummary.table_id.in_(table_ids),
+            StageLogSummary.last_successful_cdc_key.is_not(None),
+        )
+    ):
+        watermarks[table_id].cdc_key = cdc_key
+        watermarks[table_id].stage_log_id = stage_log_id
+
+    for table_id, column_name in session.exec(
+        select(Column.table_id, Column.name).where(
+            Column.table_id.in_(table_ids), Column.is_watermark, Column.is_active
+        )
+    ):
+        if watermarks[table_id].watermark_column is not None:
+            raise ValueError(
+                f"409: table with ID: {table_id} has more than one watermark column."
+            )
+        watermarks[table_id].watermark_column = column_name
+    return watermarks
+
+
+def get_table_watermark(session: Session, db_table: Table) -> TableWatermark:
+    return get_table_watermarks(session, [db_table.id])[db_table.id]